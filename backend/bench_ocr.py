@@ -0,0 +1,70 @@
+"""Compares OCR latency and text yield with and without preprocessing.
+
+Usage: python bench_ocr.py <session_dir | image ...> [--json report.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from ocr import ocr_image
+from storage import is_screenshot
+
+def collect_images(targets):
+    images = []
+    for target in targets:
+        if os.path.isdir(target):
+            images.extend(
+                os.path.join(target, fname) for fname in sorted(os.listdir(target)) if is_screenshot(fname)
+            )
+        else:
+            images.append(target)
+    return images
+
+def run(images, preprocess: bool) -> dict:
+    latencies, chars, words = [], 0, 0
+    for path in images:
+        start = time.perf_counter()
+        text = ocr_image(path, preprocess=preprocess)
+        latencies.append(time.perf_counter() - start)
+        chars += sum(ch.isalnum() for ch in text)
+        words += len(text.split())
+    latencies.sort()
+    return {
+        "preprocess": preprocess,
+        "images": len(images),
+        "total_seconds": round(sum(latencies), 3),
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 1),
+        "p95_ms": round(1000 * latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+        "alnum_chars": chars,
+        "words": words,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="+", help="session directories or image files")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    images = collect_images(args.targets)
+    if not images:
+        sys.exit("No images found")
+
+    report = {"baseline": run(images, preprocess=False), "preprocessed": run(images, preprocess=True)}
+    base, pre = report["baseline"], report["preprocessed"]
+    report["speedup"] = round(base["total_seconds"] / pre["total_seconds"], 2) if pre["total_seconds"] else None
+    report["word_yield_ratio"] = round(pre["words"] / base["words"], 2) if base["words"] else None
+
+    for row in (base, pre):
+        print(
+            f"{'preprocessed' if row['preprocess'] else 'baseline':>12}: "
+            f"{row['mean_ms']:8.1f} ms/image (p95 {row['p95_ms']:.1f}), {row['words']} words"
+        )
+    print(f"speedup x{report['speedup']}, word yield x{report['word_yield_ratio']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
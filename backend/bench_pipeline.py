@@ -0,0 +1,458 @@
+"""End-to-end pipeline benchmark on synthetic sessions (fake audio/screen devices, stub Ollama).
+
+Each stage runs in a fresh process so its peak RSS is its own. Stages whose engine is not
+installed (Whisper, Tesseract) are reported as skipped rather than failing the run.
+
+Usage: python bench_pipeline.py [--lengths 30 120] [--stages record screen ocr transcribe summarize flow]
+                                [--speed 20] [--json report.json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+
+STAGES = ("record", "screen", "ocr", "transcribe", "summarize", "flow")
+BENCH_SAMPLE_RATE = 16000
+SLIDE_SIZE = (1280, 720)
+SLIDE_SECONDS = 30  # one new synthetic slide per this much session time
+FRAME_SECONDS = 5  # session seconds between screen grabs, as with the default SCREENSHOT_INTERVAL
+WORDS_PER_SECOND = 2.5  # ~150 spoken words per minute
+LECTURE_WORDS = (
+    "gradient descent minimises the loss by stepping against the gradient while the learning rate "
+    "controls the step size and momentum smooths noisy updates across mini batches of training data"
+).split()
+
+# --- synthetic inputs -------------------------------------------------------------------------
+
+def synthetic_speech(seconds: float, samplerate: int = BENCH_SAMPLE_RATE, seed: int = 0):
+    """Speech-like int16 audio: voiced harmonics at syllable rate, with pauses and a noise floor.
+
+    Generated in 10 s pieces so long sessions do not inflate the peak RSS being measured.
+    """
+    rng = np.random.default_rng(seed)
+    out = np.empty((int(seconds * samplerate), 1), dtype=np.int16)
+    step = 10 * samplerate
+    for offset in range(0, len(out), step):
+        t = np.arange(offset, min(offset + step, len(out)), dtype=np.float64) / samplerate
+        # 140 Hz voice with a slow +-30 Hz intonation (phase is the integral of the pitch)
+        phase = 2 * np.pi * (140 * t - 30 / (2 * np.pi * 0.3) * np.cos(2 * np.pi * 0.3 * t))
+        voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+        syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)  # ~4 syllables per second
+        pauses = np.sin(2 * np.pi * t / 7) > -0.7  # a pause every few seconds
+        audio = 0.3 * voiced * syllables * pauses + rng.normal(0, 0.003, len(t))
+        out[offset:offset + len(t), 0] = np.clip(audio, -1, 1) * 32767
+    return out
+
+def lecture_text(words: int) -> str:
+    return " ".join(LECTURE_WORDS[i % len(LECTURE_WORDS)] for i in range(max(1, int(words))))
+
+def render_slide(index: int):
+    """A white 1280x720 slide with a title and bullet points, as RGB uint8."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    try:
+        font = ImageFont.load_default(size=32)
+    except TypeError:  # Pillow < 10.1 has a single bitmap size
+        font = ImageFont.load_default()
+    image = Image.new("RGB", SLIDE_SIZE, "white")
+    draw = ImageDraw.Draw(image)
+    draw.text((60, 40), f"Lecture {index + 1}: Optimisation", fill="black", font=font)
+    for line in range(8):
+        start = (index * 8 + line) * 5
+        words = [LECTURE_WORDS[(start + k) % len(LECTURE_WORDS)] for k in range(6)]
+        draw.text((80, 130 + line * 60), "- " + " ".join(words), fill="black", font=font)
+    return np.asarray(image)
+
+def write_wav(path: str, frames, samplerate: int = BENCH_SAMPLE_RATE):
+    import wave
+
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(frames.shape[1])
+        wf.setsampwidth(2)
+        wf.setframerate(samplerate)
+        wf.writeframes(frames.tobytes())
+
+def make_session(root: str, seconds: float) -> str:
+    """A finished session directory: audio.wav, slides with a manifest and a transcript."""
+    session = os.path.join(root, f"session_bench_{int(seconds)}s")
+    os.makedirs(session, exist_ok=True)
+    write_wav(os.path.join(session, "audio.wav"), synthetic_speech(seconds))
+    from PIL import Image
+    from storage import SCREENSHOT_MANIFEST
+
+    with open(os.path.join(session, SCREENSHOT_MANIFEST), "w", encoding="utf-8") as mf:
+        for i in range(max(1, int(seconds // SLIDE_SECONDS))):
+            name = f"screenshot_{i:03}.png"
+            Image.fromarray(render_slide(i)).save(os.path.join(session, name))
+            mf.write(json.dumps({"file": name, "offset": i * SLIDE_SECONDS}) + "\n")
+    with open(os.path.join(session, "transcript.txt"), "w", encoding="utf-8") as f:
+        f.write(lecture_text(seconds * WORDS_PER_SECOND))
+    return session
+
+# --- fake devices -----------------------------------------------------------------------------
+
+class FakeAudioDevice:
+    """Stands in for the sounddevice module: a mono input playing `seconds` of synthetic speech."""
+
+    def __init__(self, seconds: float, speed: float = 20.0):
+        self.seconds = seconds
+        self.speed = speed
+        self.default = SimpleNamespace(device=(0, 0))
+
+    def query_devices(self, device=None, kind=None):
+        return {"name": "synthetic", "max_input_channels": 1}
+
+    def InputStream(self, samplerate, blocksize, callback, **kwargs):
+        frames = synthetic_speech(self.seconds, int(samplerate))
+        return _FakeInputStream(frames, blocksize, blocksize / samplerate / self.speed, callback)
+
+class _FakeInputStream:
+    def __init__(self, frames, blocksize, interval, callback):
+        self.frames = frames
+        self.blocksize = blocksize
+        self.interval = interval
+        self.callback = callback
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="FakeAudio", daemon=True)
+
+    def _run(self):
+        status = SimpleNamespace(input_overflow=False, input_underflow=False)
+        next_at = time.perf_counter()
+        for start in range(0, len(self.frames), self.blocksize):
+            if self._stop.is_set():
+                return
+            block = self.frames[start:start + self.blocksize]
+            self.callback(block, len(block), None, status)
+            next_at += self.interval
+            time.sleep(max(0.0, next_at - time.perf_counter()))
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+class FakeScreen:
+    """Stands in for mss.mss(): each slide is grabbed `frames_per_slide` times, then `done` is set."""
+
+    def __init__(self, slides, frames_per_slide: int, done: threading.Event = None):
+        self.slides = [np.ascontiguousarray(slide[:, :, [2, 1, 0]]) for slide in slides]  # RGB -> BGR
+        self.frames_per_slide = frames_per_slide
+        self.done = done or threading.Event()
+        self.grabs = 0
+        height, width = slides[0].shape[:2]
+        self.monitors = [{}, {"top": 0, "left": 0, "width": width, "height": height}]
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def grab(self, monitor):
+        bgr = self.slides[min(self.grabs // self.frames_per_slide, len(self.slides) - 1)]
+        self.grabs += 1
+        if self.grabs >= len(self.slides) * self.frames_per_slide:
+            self.done.set()
+        height, width = bgr.shape[:2]
+        bgra = np.dstack([bgr, np.full((height, width), 255, np.uint8)])
+        return SimpleNamespace(
+            bgra=bgra.tobytes(), rgb=bgr[:, :, ::-1].tobytes(), size=(width, height), width=width, height=height
+        )
+
+    def shot(self, mon=1, output=None):
+        shot = self.grab(self.monitors[mon])
+        write_png(shot.rgb, shot.size, output=output)
+        return output
+
+def write_png(rgb, size, output=None):
+    """Pillow stand-in for mss.tools.to_png, so the benchmark also runs where mss is not installed."""
+    from PIL import Image
+
+    Image.frombytes("RGB", size, rgb).save(output)
+
+def install_fake_devices(record, seconds, slides, frames_per_slide, speed, frame_interval=0):
+    """Points record.py at the fake devices; returns the fake screen."""
+    record.sd = FakeAudioDevice(seconds, speed=speed)
+    screen = FakeScreen(slides, frames_per_slide)
+    record.mss = SimpleNamespace(mss=screen, tools=SimpleNamespace(to_png=write_png))
+    record.SCREENSHOT_INTERVAL = frame_interval
+    return screen
+
+# --- stages (each runs in its own process) ----------------------------------------------------
+
+def stage_record(workdir, seconds, speed):
+    import record
+
+    record.sd = FakeAudioDevice(seconds, speed=speed)
+    stats = record.CaptureStats()
+    start = time.perf_counter()
+    record.record_audio(
+        os.path.join(workdir, "audio.wav"), duration=seconds, samplerate=BENCH_SAMPLE_RATE,
+        stats=stats, stop_event=threading.Event(),
+    )
+    wall = time.perf_counter() - start
+    return {
+        "wall_seconds": wall,
+        "throughput": seconds / wall,
+        "throughput_unit": "audio s/s",
+        "frames": stats.frames,
+        "dropped_frames": stats.dropped_frames,
+        "max_queue_depth": stats.max_queue_depth,
+    }
+
+def stage_screen(workdir, seconds, speed):
+    import record
+
+    slides = [render_slide(i) for i in range(max(1, int(seconds // SLIDE_SECONDS)))]
+    screen = install_fake_devices(record, 1, slides, SLIDE_SECONDS // FRAME_SECONDS, speed)
+    record.AUDIO_DURATION = 3600  # the fake screen ends the capture
+    start = time.perf_counter()
+    record.capture_screen(workdir, stop_event=screen.done)
+    wall = time.perf_counter() - start
+    kept = sum(1 for name in os.listdir(workdir) if name.endswith(".png"))
+    frames = screen.grabs
+    return {"wall_seconds": wall, "throughput": frames / wall, "throughput_unit": "frames/s", "frames": frames, "kept": kept}
+
+def stage_ocr(workdir, seconds, speed):
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+    except Exception as e:
+        return {"skipped": f"Tesseract unavailable: {e}"}
+    from ocr import ocr_image
+
+    session = make_session(workdir, seconds)
+    images = sorted(os.path.join(session, f) for f in os.listdir(session) if f.endswith(".png"))
+    start = time.perf_counter()
+    words = sum(len(ocr_image(path).split()) for path in images)
+    wall = time.perf_counter() - start
+    return {"wall_seconds": wall, "throughput": len(images) / wall, "throughput_unit": "images/s", "words": words}
+
+def stage_transcribe(workdir, seconds, speed):
+    import transcribe
+
+    try:
+        backend = transcribe.get_backend()
+    except (ValueError, RuntimeError) as e:
+        return {"skipped": str(e)}
+    path = os.path.join(workdir, "audio.wav")
+    write_wav(path, synthetic_speech(seconds))
+    start = time.perf_counter()
+    transcribe.get_model(transcribe.OPENAI_MODEL, backend.name)
+    load_seconds = time.perf_counter() - start
+    segments = transcribe.transcribe_segments(path)
+    wall = time.perf_counter() - start
+    return {
+        "wall_seconds": wall,
+        "throughput": seconds / (wall - load_seconds),
+        "throughput_unit": "audio s/s",
+        "backend": backend.name,
+        "model_load_seconds": load_seconds,
+        "segments": len(segments),
+    }
+
+def stage_summarize(workdir, seconds, speed):
+    import stub_ollama
+
+    server = stub_ollama.start_stub_server()
+    os.environ["OLLAMA_URL"] = server.url
+    os.environ["SUMMARY_CACHE_DIR"] = os.path.join(workdir, "summary_cache")
+    from summarize import summarize, estimate_tokens
+
+    text = lecture_text(seconds * WORDS_PER_SECOND)
+    start = time.perf_counter()
+    summary = summarize(text)
+    wall = time.perf_counter() - start
+    server.shutdown()
+    return {
+        "wall_seconds": wall,
+        "throughput": estimate_tokens(text) / wall,
+        "throughput_unit": "input tokens/s",
+        "llm_requests": len(server.requests),
+        "ok": bool(summary) and "raw" not in summary,
+    }
+
+def stage_flow(workdir, seconds, speed):
+    """/start-session -> /stop-session -> /transcribe -> /ocr -> /summarize through the FastAPI app."""
+    import stub_ollama
+
+    server = stub_ollama.start_stub_server()
+    os.environ.update(
+        OLLAMA_URL=server.url,
+        SESSIONS_DIR=os.path.join(workdir, "sessions"),
+        JOB_DB_PATH=os.path.join(workdir, "jobs.db"),
+        CATALOG_DB_PATH=os.path.join(workdir, "catalog.db"),
+        SEARCH_DB_PATH=os.path.join(workdir, "search.db"),
+        SUMMARY_CACHE_DIR=os.path.join(workdir, "summary_cache"),
+        OCR_CACHE_DIR=os.path.join(workdir, "ocr_cache"),
+        DEFAULT_AUDIO_DURATION=str(int(seconds)),
+    )
+    import transcribe
+
+    try:
+        transcribe.get_backend()
+        can_transcribe = True
+    except (ValueError, RuntimeError):
+        can_transcribe = False
+    os.environ["STREAM_TRANSCRIPTION"] = "true" if can_transcribe else "false"
+
+    import record
+
+    slides = [render_slide(i) for i in range(max(1, int(seconds // SLIDE_SECONDS)))]
+    # Grab frames at the pace the fake audio plays, so slides change along the recording
+    install_fake_devices(record, seconds, slides, SLIDE_SECONDS // FRAME_SECONDS, speed, FRAME_SECONDS / speed)
+
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    steps = {}
+
+    def step(name, fn):
+        start = time.perf_counter()
+        result = fn()
+        steps[name] = round(time.perf_counter() - start, 3)
+        return result
+
+    def wait_job(job_id):
+        while True:
+            job = client.get(f"/jobs/{job_id}").json()
+            if job["status"] in ("done", "error"):
+                return job
+            time.sleep(0.05)
+
+    def record_session():
+        session_id = client.post("/start-session").json()["session_id"]
+        while client.get("/session-status", params={"session_id": session_id}).json()["audio_alive"]:
+            time.sleep(0.05)
+        client.post("/stop-session", params={"session_id": session_id})
+        # Finished sessions leave the registry, so get() returns None once capture has ended
+        while (session := main.session_manager.get(session_id)) is not None and session.recording:
+            time.sleep(0.05)
+        return session_id
+
+    start = time.perf_counter()
+    session_id = step("record", record_session)
+    session_dir = os.path.join(os.environ["SESSIONS_DIR"], session_id)
+    if can_transcribe:
+        step("transcribe", lambda: client.post("/transcribe", params={"session_id": session_id}).json())
+    else:
+        # No Whisper here: stand in with the text a lecture of this length would produce
+        with open(os.path.join(session_dir, "transcript.txt"), "w", encoding="utf-8") as f:
+            f.write(lecture_text(seconds * WORDS_PER_SECOND))
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        step("ocr", lambda: wait_job(client.post("/ocr", params={"session_id": session_id}).json()["jobId"]))
+    except Exception:
+        pass
+    summary = step(
+        "summarize", lambda: wait_job(client.post("/summarize", params={"session_id": session_id}).json()["jobId"])
+    )
+    wall = time.perf_counter() - start
+    server.shutdown()
+    return {
+        "wall_seconds": wall,
+        "throughput": seconds / wall,
+        "throughput_unit": "session s/s",
+        "steps": steps,
+        "transcribed": can_transcribe,
+        "ok": summary["status"] == "done",
+    }
+
+# --- harness ----------------------------------------------------------------------------------
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def _child(stage, workdir, seconds, speed, results):
+    os.chdir(workdir)  # modules that log to ./logs keep their files out of the tree
+    try:
+        result = globals()[f"stage_{stage}"](workdir, seconds, speed)
+    except Exception as e:
+        result = {"error": f"{type(e).__name__}: {e}"}
+    result["peak_rss_mb"] = peak_rss_mb()
+    results.put(result)
+
+def run_stage(stage: str, seconds: float, speed: float) -> dict:
+    workdir = tempfile.mkdtemp(prefix=f"bench_{stage}_")
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(stage, workdir, seconds, speed, results))
+    proc.start()
+    try:
+        result = results.get()
+    finally:
+        proc.join()
+        shutil.rmtree(workdir, ignore_errors=True)
+    for key in ("wall_seconds", "throughput", "model_load_seconds"):
+        if isinstance(result.get(key), float):
+            result[key] = round(result[key], 3)
+    return {"stage": stage, "session_seconds": seconds, **result}
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", nargs="+", type=float, default=[30, 120], help="session lengths in seconds")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--speed", type=float, default=20.0, help="fake audio device speed (x real time)")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    report = {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "speed": args.speed,
+        "results": [],
+    }
+    for seconds in args.lengths:
+        for stage in args.stages:
+            row = run_stage(stage, seconds, args.speed)
+            report["results"].append(row)
+            if "skipped" in row or "error" in row:
+                print(f"{stage:>10} {seconds:6.0f}s: {row.get('skipped') or row.get('error')}")
+            else:
+                print(
+                    f"{stage:>10} {seconds:6.0f}s: {row['wall_seconds']:8.2f}s wall, "
+                    f"{row['throughput']:9.2f} {row['throughput_unit']}, peak RSS {row['peak_rss_mb']} MB"
+                )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
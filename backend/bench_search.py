@@ -0,0 +1,115 @@
+"""Search index benchmark: indexing throughput and query latency over many synthetic sessions.
+
+Transcript words follow a Zipf distribution over a synthetic vocabulary (plus the benchmark lecture
+words and a few rare topic words per session), so queries hit a realistic mix of common and
+selective terms. --embeddings also builds vectors
+through the stub Ollama server and times semantic and hybrid queries.
+
+Usage: python bench_search.py [--sessions 2000] [--minutes 60] [--queries 200] [--embeddings] [--json report.json]
+"""
+import os
+import json
+import time
+import random
+import itertools
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import datetime
+
+from bench_pipeline import git_commit, LECTURE_WORDS
+from storage import SEGMENTS_FILE
+
+TOPICS = [f"topic{i:04d}" for i in range(500)]  # rare words, each used by a handful of sessions
+VOCABULARY = LECTURE_WORDS + [f"word{i:05d}" for i in range(20000)]
+CUM_WEIGHTS = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+def make_sessions(root: str, count: int, minutes: float, seed: int = 0):
+    rng = random.Random(seed)
+    for n in range(count):
+        session = os.path.join(root, f"session_bench_{n:05d}")
+        os.makedirs(session)
+        topics = rng.sample(TOPICS, 3)
+        with open(os.path.join(session, SEGMENTS_FILE), "w", encoding="utf-8") as f:
+            for i in range(int(minutes * 60 / 5)):  # one ~5 s segment of ~12 words
+                words = rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=12)
+                if rng.random() < 0.02:
+                    words[rng.randrange(12)] = rng.choice(topics)
+                f.write(json.dumps({"start": i * 5.0, "end": i * 5.0 + 4.8, "text": " ".join(words)}) + "\n")
+
+def percentiles(samples) -> dict:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--minutes", type=float, default=60, help="transcript length per session")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--embeddings", action="store_true", help="also benchmark semantic search (stub Ollama)")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    embed = None
+    if args.embeddings:
+        from stub_ollama import start_stub_server
+        os.environ["OLLAMA_URL"] = start_stub_server().url  # read when the Ollama client is created
+        from search import ollama_embedder
+        embed = ollama_embedder
+    from search import SearchIndex
+
+    report = {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sessions": args.sessions,
+        "minutes": args.minutes,
+    }
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory(prefix="bench-search-") as tmp:
+        sessions_dir = os.path.join(tmp, "sessions")
+        make_sessions(sessions_dir, args.sessions, args.minutes)
+        index = SearchIndex(os.path.join(tmp, "search.db"), embed=embed)
+
+        start = time.perf_counter()
+        index.index_all(sessions_dir)
+        build = time.perf_counter() - start
+        report["index"] = {**index.stats(), "build_seconds": round(build, 2), "sessions_per_second": round(args.sessions / build, 1)}
+        start = time.perf_counter()
+        index.index_all(sessions_dir)
+        report["index"]["noop_pass_seconds"] = round(time.perf_counter() - start, 3)
+        print(
+            f"indexed {args.sessions} sessions ({report['index']['chunks']} chunks) in {build:.1f}s; "
+            f"up-to-date pass {report['index']['noop_pass_seconds']:.2f}s"
+        )
+
+        queries = {
+            "rare term": lambda: rng.choice(TOPICS),
+            "common terms": lambda: " ".join(rng.sample(LECTURE_WORDS[:10], 2)),
+            "mixed": lambda: f"{rng.choice(LECTURE_WORDS)} {rng.choice(TOPICS)}",
+        }
+        modes = ["keyword"] + (["semantic", "hybrid"] if embed else [])
+        report["queries"] = []
+        for mode in modes:
+            for label, make_query in queries.items():
+                samples = []
+                for _ in range(args.queries):
+                    query = make_query()
+                    start = time.perf_counter()
+                    index.search(query, limit=20, mode=mode)
+                    samples.append(time.perf_counter() - start)
+                row = {"mode": mode, "query": label, **percentiles(samples)}
+                report["queries"].append(row)
+                print(f"{mode:>8} {label:>12}: p50 {row['p50_ms']:7.2f} ms, p95 {row['p95_ms']:7.2f} ms")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
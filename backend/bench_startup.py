@@ -0,0 +1,115 @@
+"""Measures backend import (startup) time and which heavy dependencies each entry module pulls in.
+
+Every run imports the module in a fresh interpreter with `-X importtime`, so nothing is cached
+in-process; the median over --runs is reported with the slowest imports of the last run.
+
+Usage: python bench_startup.py [--modules main transcribe ocr summarize] [--runs 5] [--top 10] [--json report.json]
+"""
+import os
+import sys
+import json
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+from bench_pipeline import git_commit
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+# Modules that should only load when their feature is used, never on API startup
+HEAVY_MODULES = (
+    "sounddevice", "mss", "whisper", "faster_whisper", "torch", "ctranslate2",
+    "langchain", "pytesseract", "youtube_transcript_api",
+)
+PROBE = (
+    "import sys, time, json; start = time.perf_counter(); import {module}; "
+    "elapsed = time.perf_counter() - start; "
+    "print(json.dumps({{'seconds': elapsed, 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))"
+)
+
+def parse_importtime(stderr: str) -> list:
+    """Returns [(cumulative_us, self_us, module)] from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    return rows
+
+def measure(module: str, scratch_dir: str) -> dict:
+    # main creates its session directory and databases on import; keep them out of the tree
+    env = dict(
+        os.environ,
+        SESSIONS_DIR=os.path.join(scratch_dir, "sessions"),
+        CATALOG_DB_PATH=os.path.join(scratch_dir, "catalog.db"),
+        JOB_DB_PATH=os.path.join(scratch_dir, "jobs.db"),
+        SEARCH_DB_PATH=os.path.join(scratch_dir, "search.db"),
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed"}
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    return {**probe, "imports": parse_importtime(result.stderr)}
+
+def run(module: str, runs: int, top: int, scratch_dir: str) -> dict:
+    samples = [measure(module, scratch_dir) for _ in range(runs)]
+    failed = [s for s in samples if "error" in s]
+    if failed:
+        return {"module": module, "error": failed[0]["error"]}
+    last = samples[-1]
+    # Top-level packages only, so numpy's submodules do not crowd out the other costs
+    packages = [row for row in last["imports"] if "." not in row[2]]
+    return {
+        "module": module,
+        "runs": runs,
+        "median_seconds": round(statistics.median(s["seconds"] for s in samples), 4),
+        "min_seconds": round(min(s["seconds"] for s in samples), 4),
+        "modules_loaded": len(last["imports"]),
+        "heavy_loaded": last["heavy"],
+        "slowest_imports": [
+            {"module": name, "cumulative_ms": round(cum / 1000, 1), "self_ms": round(own / 1000, 1)}
+            for cum, own, name in sorted(packages, reverse=True)[:top]
+        ],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=["main", "transcribe", "ocr", "summarize"])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports listed per module")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="bench-startup-") as scratch_dir:
+        for module in args.modules:
+            row = run(module, max(1, args.runs), args.top, scratch_dir)
+            report["results"].append(row)
+            if "error" in row:
+                print(f"{module:>12}: {row['error']}")
+                continue
+            heavy = ", ".join(row["heavy_loaded"]) or "none"
+            print(
+                f"{module:>12}: {row['median_seconds'] * 1000:8.1f} ms median import, "
+                f"{row['modules_loaded']} modules, heavy: {heavy}"
+            )
+            for entry in row["slowest_imports"]:
+                print(f"{'':>14}{entry['cumulative_ms']:8.1f} ms  {entry['module']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compares transcription backends (with and without VAD) by real-time factor on the same audio.
+
+Usage: python bench_transcribe.py <audio.wav> [--backends whisper faster-whisper] [--model base] [--json report.json]
+"""
+import sys
+import json
+import time
+import argparse
+
+from transcribe import (
+    BACKENDS, OPENAI_MODEL, WHISPER_SAMPLE_RATE, get_backend, get_model, load_audio, transcribe_audio,
+)
+
+def run(audio, backend: str, model_name: str, vad: bool) -> dict:
+    start = time.perf_counter()
+    get_model(model_name, backend)  # load outside the timed decode
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    segments = transcribe_audio(audio, model_name, backend, vad)
+    decode_seconds = time.perf_counter() - start
+    audio_seconds = len(audio) / WHISPER_SAMPLE_RATE
+    return {
+        "backend": backend,
+        "model": model_name,
+        "vad": vad,
+        "audio_seconds": round(audio_seconds, 2),
+        "load_seconds": round(load_seconds, 3),
+        "decode_seconds": round(decode_seconds, 3),
+        "rtf": round(decode_seconds / audio_seconds, 3) if audio_seconds else None,
+        "segments": len(segments),
+        "words": sum(len(seg["text"].split()) for seg in segments),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("audio", help="audio file to transcribe")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), help="backends to compare")
+    parser.add_argument("--model", default=OPENAI_MODEL, help="Whisper model size")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    backends = []
+    for name in args.backends:
+        try:
+            backends.append(get_backend(name).name)
+        except (ValueError, RuntimeError) as e:
+            print(f"skipping {name}: {e}")
+    if not backends:
+        sys.exit("No transcription backend available")
+
+    start = time.perf_counter()
+    audio = load_audio(args.audio, backends[0])  # decode + resample to 16 kHz, shared by every run
+    report = {"audio": args.audio, "audio_load_seconds": round(time.perf_counter() - start, 3)}
+    report["runs"] = [run(audio, name, args.model, vad) for name in backends for vad in (False, True)]
+
+    print(f"audio load (decode + resample): {report['audio_load_seconds']:.2f}s")
+    for row in report["runs"]:
+        print(
+            f"{row['backend']:>15} vad={'on ' if row['vad'] else 'off'}: "
+            f"RTF {row['rtf']:.3f} ({row['decode_seconds']:.1f}s for {row['audio_seconds']:.1f}s audio, "
+            f"load {row['load_seconds']:.1f}s), {row['words']} words"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
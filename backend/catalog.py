@@ -0,0 +1,265 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+
+from storage import OCR_COMBINED_FILE
+
+# Index of sessions and their artifacts, so lookups do not rescan SESSIONS_DIR
+CATALOG_DB_PATH = os.getenv(
+    "CATALOG_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.db")
+)
+
+STATE_FLAGS = ("recording", "transcribed", "ocr_done", "summarized", "compacted")
+
+def artifact_kind(name: str) -> str:
+    if name.startswith("screenshot_") and name.endswith((".png", ".webp")):
+        return "screenshot"
+    if name.startswith("ocr_") and name.endswith(".txt"):
+        return "ocr"
+    return {
+        "audio.wav": "audio",
+        "audio.flac": "audio",
+        "audio.opus": "audio",
+        "transcript.txt": "transcript",
+        "summary.json": "summary",
+        OCR_COMBINED_FILE: "ocr_combined",
+    }.get(name, "other")
+
+def created_from_name(session_id: str, fallback: float) -> float:
+    """Recovers the start time encoded in session_%Y%m%d_%H%M%S[_n] folder names."""
+    try:
+        return datetime.strptime(session_id[:len("session_20000101_000000")], "session_%Y%m%d_%H%M%S").timestamp()
+    except ValueError:
+        return fallback
+
+class SessionCatalog:
+    """SQLite catalogue of sessions: artifacts with sizes, processing state and summary overview."""
+
+    def __init__(self, sessions_dir, path=CATALOG_DB_PATH):
+        self.sessions_dir = sessions_dir
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                created REAL NOT NULL,
+                updated REAL NOT NULL,
+                recording INTEGER NOT NULL DEFAULT 0,
+                transcribed INTEGER NOT NULL DEFAULT 0,
+                ocr_done INTEGER NOT NULL DEFAULT 0,
+                summarized INTEGER NOT NULL DEFAULT 0,
+                compacted INTEGER NOT NULL DEFAULT 0,
+                overview TEXT,
+                size INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS sessions_created ON sessions (created);
+            CREATE TABLE IF NOT EXISTS artifacts (
+                session_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                PRIMARY KEY (session_id, name)
+            );
+            CREATE INDEX IF NOT EXISTS artifacts_kind ON artifacts (session_id, kind);
+            """
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(sessions)")}
+        if "compacted" not in columns:  # catalogues created before storage compaction existed
+            self._db.execute("ALTER TABLE sessions ADD COLUMN compacted INTEGER NOT NULL DEFAULT 0")
+        self._db.commit()
+
+    def register(self, session_id, created=None, recording=False):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO sessions (id, created, updated, recording) VALUES (?, ?, ?, ?)",
+                (session_id, created or now, now, int(recording)),
+            )
+            self._db.commit()
+
+    def set_state(self, session_id, overview=None, **flags):
+        """Updates processing flags (recording, transcribed, ocr_done, summarized, compacted) and the overview."""
+        columns = {key: int(value) for key, value in flags.items() if key in STATE_FLAGS}
+        if overview is not None:
+            columns["overview"] = overview
+        columns["updated"] = time.time()
+        assignments = ", ".join(f"{key} = ?" for key in columns)
+        with self._lock:
+            self._db.execute(f"UPDATE sessions SET {assignments} WHERE id = ?", (*columns.values(), session_id))
+            self._db.commit()
+
+    def record_artifact(self, session_id, name):
+        """Indexes (or refreshes) one file of the session after it was written."""
+        path = os.path.join(self.sessions_dir, session_id, name)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO sessions (id, created, updated) VALUES (?, ?, ?)",
+                (session_id, created_from_name(session_id, now), now),
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO artifacts (session_id, name, kind, size, mtime) VALUES (?, ?, ?, ?, ?)",
+                (session_id, name, artifact_kind(name), st.st_size, st.st_mtime),
+            )
+            self._update_size(session_id)
+            self._db.commit()
+
+    def sync(self, session_id):
+        """Re-indexes every file of one session directory (one listdir of that session only)."""
+        session_dir = os.path.join(self.sessions_dir, session_id)
+        rows = []
+        for entry in os.scandir(session_dir):
+            if entry.is_file():
+                st = entry.stat()
+                rows.append((session_id, entry.name, artifact_kind(entry.name), st.st_size, st.st_mtime))
+        names = {row[1] for row in rows}
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO sessions (id, created, updated) VALUES (?, ?, ?)",
+                (session_id, created_from_name(session_id, os.stat(session_dir).st_mtime), time.time()),
+            )
+            self._db.execute("DELETE FROM artifacts WHERE session_id = ?", (session_id,))
+            self._db.executemany(
+                "INSERT INTO artifacts (session_id, name, kind, size, mtime) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._db.execute(
+                "UPDATE sessions SET transcribed = ?, ocr_done = ?, summarized = ?, updated = ? WHERE id = ?",
+                (
+                    int("transcript.txt" in names),
+                    int(OCR_COMBINED_FILE in names),
+                    int("summary.json" in names),
+                    time.time(),
+                    session_id,
+                ),
+            )
+            self._update_size(session_id)
+            self._db.commit()
+
+    def index_missing(self):
+        """Adds session directories that are on disk but not catalogued (e.g. from older versions)."""
+        with self._lock:
+            known = {row[0] for row in self._db.execute("SELECT id FROM sessions")}
+        added = 0
+        for entry in os.scandir(self.sessions_dir):
+            if entry.is_dir() and entry.name not in known:
+                self.sync(entry.name)
+                added += 1
+        if added:
+            logging.info(f"Catalogued {added} existing session(s)")
+        return added
+
+    def reset_interrupted(self):
+        """Clears the recording flag of sessions a previous process never finalized, and re-indexes them.
+
+        Call at startup, before this process starts recording; returns the affected ids.
+        """
+        with self._lock:
+            ids = [row[0] for row in self._db.execute("SELECT id FROM sessions WHERE recording = 1")]
+            self._db.execute("UPDATE sessions SET recording = 0, updated = ? WHERE recording = 1", (time.time(),))
+            self._db.commit()
+        for session_id in ids:
+            if os.path.isdir(os.path.join(self.sessions_dir, session_id)):
+                self.sync(session_id)
+            else:
+                self.remove(session_id)
+        return ids
+
+    def remove(self, session_id):
+        with self._lock:
+            self._db.execute("DELETE FROM artifacts WHERE session_id = ?", (session_id,))
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            self._db.commit()
+
+    def usage(self):
+        """Every session oldest first, with its total size, the bytes taken by audio and screenshots,
+        how many of those files are still WAV/PNG, whether audio.wav is one of them and whether
+        the session went through compaction already."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT s.id, s.created, s.recording, s.size,"
+                " COALESCE(SUM(CASE WHEN a.kind IN ('audio', 'screenshot') THEN a.size END), 0),"
+                " COALESCE(SUM(a.name = 'audio.wav' OR (a.kind = 'screenshot' AND a.name LIKE '%.png')), 0),"
+                " COALESCE(SUM(a.name = 'audio.wav'), 0), s.compacted"
+                " FROM sessions s LEFT JOIN artifacts a ON a.session_id = s.id"
+                " GROUP BY s.id ORDER BY s.created, s.id"
+            ).fetchall()
+        return [
+            {
+                "id": r[0], "created": r[1], "recording": bool(r[2]), "size": r[3], "media": r[4],
+                "uncompressed": r[5], "wav": bool(r[6]), "compacted": bool(r[7]),
+            }
+            for r in rows
+        ]
+
+    def _update_size(self, session_id):
+        self._db.execute(
+            "UPDATE sessions SET size = (SELECT COALESCE(SUM(size), 0) FROM artifacts WHERE session_id = ?) WHERE id = ?",
+            (session_id, session_id),
+        )
+
+    def latest(self):
+        with self._lock:
+            row = self._db.execute("SELECT id FROM sessions ORDER BY created DESC, id DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def artifacts(self, session_id, kind=None):
+        query = "SELECT name, kind, size, mtime FROM artifacts WHERE session_id = ?"
+        params = [session_id]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY name", params).fetchall()
+        return [{"name": r[0], "kind": r[1], "size": r[2], "mtime": r[3]} for r in rows]
+
+    def get(self, session_id, with_artifacts=True):
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT id, created, updated, {', '.join(STATE_FLAGS)}, overview, size FROM sessions WHERE id = ?",
+                (session_id,),
+            ).fetchone()
+        if not row:
+            return None
+        session = self._row(row)
+        if with_artifacts:
+            session["artifacts"] = self.artifacts(session_id)
+        return session
+
+    def list(self, offset=0, limit=20, q=None, state=None):
+        """Newest first; `q` matches the session id or summary overview, `state` is a flag that must be set."""
+        where, params = [], []
+        if q:
+            where.append("(id LIKE ? OR overview LIKE ?)")
+            params += [f"%{q}%", f"%{q}%"]
+        if state:
+            if state not in STATE_FLAGS:
+                raise ValueError(f"Unknown state: {state}")
+            where.append(f"{state} = 1")
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        with self._lock:
+            total = self._db.execute(f"SELECT COUNT(*) FROM sessions {clause}", params).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT id, created, updated, {', '.join(STATE_FLAGS)}, overview, size FROM sessions {clause}"
+                " ORDER BY created DESC, id DESC LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return {"total": total, "offset": offset, "limit": limit, "sessions": [self._row(r) for r in rows]}
+
+    @staticmethod
+    def _row(row):
+        session = {"id": row[0], "created": row[1], "updated": row[2]}
+        for i, flag in enumerate(STATE_FLAGS):
+            session[flag] = bool(row[3 + i])
+        session["overview"] = row[3 + len(STATE_FLAGS)]
+        session["size"] = row[4 + len(STATE_FLAGS)]
+        return session
@@ -0,0 +1,305 @@
+import os
+import json
+import time
+import queue
+import sqlite3
+import logging
+import threading
+import cProfile
+import itertools
+from uuid import uuid4
+
+import metrics
+
+# Background work (transcription, OCR, summarization) runs on a bounded pool of workers;
+# job state lives in SQLite so it survives restarts and is cleaned up after JOB_TTL_HOURS.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.db"))
+JOB_TTL_HOURS = float(os.getenv("JOB_TTL_HOURS", 24))
+CLEANUP_INTERVAL = 600  # seconds between TTL sweeps
+
+# Lower runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+ACTIVE_STATUSES = ("pending", "running")
+
+class JobStore:
+    """SQLite-backed job records: status, result, progress and partial results."""
+
+    def __init__(self, path=JOB_DB_PATH):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                dedupe_key TEXT,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                progress TEXT,
+                partial TEXT,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe_key, status)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_updated ON jobs (updated)")
+        self._db.commit()
+
+    def create(self, job_id, kind, dedupe_key=None, priority=PRIORITY_NORMAL, status="pending", result=None):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, dedupe_key, priority, status, result, progress, partial, created, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, NULL, ?, ?, ?)",
+                (job_id, kind, dedupe_key, priority, status, json.dumps(result), json.dumps({}), now, now),
+            )
+            self._db.commit()
+
+    def update(self, job_id, **fields):
+        columns = {key: json.dumps(value) if key in ("result", "progress", "partial") else value
+                   for key, value in fields.items()}
+        columns["updated"] = time.time()
+        assignments = ", ".join(f"{key} = ?" for key in columns)
+        with self._lock:
+            self._db.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*columns.values(), job_id))
+            self._db.commit()
+
+    def set_partial(self, job_id, key, value):
+        with self._lock:
+            row = self._db.execute("SELECT partial FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            partial = json.loads(row[0] or "{}") if row else {}
+            partial[key] = value
+            self._db.execute(
+                "UPDATE jobs SET partial = ?, updated = ? WHERE id = ?", (json.dumps(partial), time.time(), job_id)
+            )
+            self._db.commit()
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, kind, status, result, progress, partial, created, updated FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "result": json.loads(row[3]) if row[3] else None,
+            "progress": json.loads(row[4]) if row[4] else None,
+            "partial": json.loads(row[5]) if row[5] else {},
+            "created": row[6],
+            "updated": row[7],
+        }
+
+    def find_active(self, dedupe_key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN (?, ?) ORDER BY created LIMIT 1",
+                (dedupe_key, *ACTIVE_STATUSES),
+            ).fetchone()
+        return row[0] if row else None
+
+    def count_active(self):
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", ACTIVE_STATUSES
+            ).fetchone()[0]
+
+    def fail_interrupted(self):
+        """Marks jobs left active by a previous process as failed; their work cannot be resumed."""
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE jobs SET status = 'error', result = ?, updated = ? WHERE status IN (?, ?)",
+                (json.dumps("Interrupted by server restart"), time.time(), *ACTIVE_STATUSES),
+            )
+            self._db.commit()
+        return cur.rowcount
+
+    def cleanup(self, ttl_hours=JOB_TTL_HOURS):
+        """Deletes finished jobs not updated within the TTL."""
+        cutoff = time.time() - ttl_hours * 3600
+        with self._lock:
+            cur = self._db.execute(
+                "DELETE FROM jobs WHERE status NOT IN (?, ?) AND updated < ?", (*ACTIVE_STATUSES, cutoff)
+            )
+            self._db.commit()
+        return cur.rowcount
+
+class JobContext:
+    """Handed to job functions so they can report progress and partial results."""
+
+    def __init__(self, store, job_id):
+        self.store = store
+        self.id = job_id
+
+    def progress(self, done, total):
+        self.store.update(self.id, progress={"done": done, "total": total})
+
+    def partial(self, key, value):
+        self.store.set_partial(self.id, key, value)
+
+class JobQueue:
+    """Priority queue of jobs drained by a fixed number of worker threads.
+
+    Jobs with the same `dedupe_key` coalesce: submitting while one is pending or running
+    returns the in-flight job instead of starting another.
+    """
+
+    def __init__(self, store=None, workers=JOB_WORKERS):
+        self.store = store or JobStore()
+        self.workers = max(1, workers)
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._events = {}  # job_id -> Event set when the job finishes (jobs of this process only)
+        self._profile = {}  # job_id -> "cprofile" | "sample", armed before the job starts
+        self._running = {}  # job_id -> (worker thread id, sampler or None)
+        self._threads = []
+        self._last_cleanup = 0.0
+        interrupted = self.store.fail_interrupted()
+        if interrupted:
+            logging.warning(f"Marked {interrupted} job(s) from a previous run as interrupted")
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._work, name=f"JobWorker-{len(self._threads)}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, kind, fn, dedupe_key=None, priority=PRIORITY_NORMAL, after=None):
+        """Queues `fn(ctx)`; returns (job_id, joined) where joined means an in-flight job was reused.
+
+        With `after`, the job stays pending until `after()` returns (e.g. a live transcriber's join);
+        that wait runs on a thread of its own, so it never holds a worker.
+        """
+        self._maybe_cleanup()
+        with self._lock:
+            if dedupe_key:
+                existing = self.store.find_active(dedupe_key)
+                if existing:
+                    logging.info(f"Joining in-flight {kind} job {existing} ({dedupe_key})")
+                    return existing, True
+            job_id = uuid4().hex
+            self.store.create(job_id, kind, dedupe_key, priority)
+            self._events[job_id] = threading.Event()
+            if metrics.JOB_PROFILING and kind in metrics.PROFILE_JOB_KINDS:
+                self._profile[job_id] = "cprofile"
+            entry = (priority, next(self._seq), job_id, kind, fn)
+            if after is None:
+                self._queue.put((*entry[:4], time.monotonic(), fn))
+            else:
+                threading.Thread(
+                    target=self._enqueue_after, args=(after, entry), name=f"JobWait-{job_id[:8]}", daemon=True
+                ).start()
+            self._start_workers()
+        metrics.inc("jobs_submitted_total", kind=kind)
+        logging.info(f"Queued {kind} job {job_id} (priority {priority}, depth {self._queue.qsize()})")
+        return job_id, False
+
+    def _enqueue_after(self, after, entry):
+        try:
+            after()
+        except Exception:
+            logging.exception(f"Waiting to queue job {entry[2]} failed; queueing it anyway")
+        self._queue.put((*entry[:4], time.monotonic(), entry[4]))
+
+    def record(self, kind, result, dedupe_key=None):
+        """Stores an already finished job (e.g. a cache hit) so clients can fetch it like any other."""
+        job_id = uuid4().hex
+        self.store.create(job_id, kind, dedupe_key, PRIORITY_NORMAL, status="done", result=result)
+        return job_id
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def wait(self, job_id, timeout=None):
+        """Blocks until the job finishes; returns its record."""
+        event = self._events.get(job_id)
+        if event is not None:
+            event.wait(timeout)
+        return self.store.get(job_id)
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def running(self):
+        return len(self._running)
+
+    def profile(self, job_id, mode="cprofile"):
+        """Profiles a job of this process: cProfile must be armed before it starts, sampling works any time.
+
+        Raises KeyError for unknown jobs and ValueError when the job can no longer be profiled.
+        """
+        if mode not in ("cprofile", "sample"):
+            raise ValueError(f"Unknown profile mode '{mode}'")
+        with self._lock:
+            job = self.store.get(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            if job["status"] == "pending" and job_id in self._events:
+                self._profile[job_id] = mode
+                return "armed"
+            running = self._running.get(job_id)
+            if running and mode == "sample" and running[1] is None:
+                self._running[job_id] = (running[0], metrics.StackSampler(running[0]).start())
+                return "sampling"
+        raise ValueError(f"Job is {job['status']}; only pending jobs (or running ones with mode=sample) can be profiled")
+
+    def _work(self):
+        while True:
+            priority, _, job_id, kind, queued_at, fn = self._queue.get()
+            metrics.observe("job_wait_seconds", time.monotonic() - queued_at, doc="Time jobs spent queued", kind=kind)
+            self.store.update(job_id, status="running")
+            with self._lock:
+                mode = self._profile.pop(job_id, None)
+                sampler = metrics.StackSampler(threading.get_ident()).start() if mode == "sample" else None
+                self._running[job_id] = (threading.get_ident(), sampler)
+            profiler = cProfile.Profile() if mode == "cprofile" else None
+            status = "error"
+            start = time.perf_counter()
+            try:
+                if profiler:
+                    profiler.enable()
+                try:
+                    result = fn(JobContext(self.store, job_id))
+                finally:
+                    if profiler:
+                        profiler.disable()
+                self.store.update(job_id, status="done", result=result)
+                status = "done"
+                logging.info(f"✅ Job {job_id} done")
+            except Exception as e:
+                self.store.update(job_id, status="error", result=str(e))
+                logging.exception(f"Job {job_id} failed")
+            finally:
+                metrics.observe("job_seconds", time.perf_counter() - start, doc="Job run time", kind=kind, status=status)
+                with self._lock:
+                    _, sampler = self._running.pop(job_id)
+                try:
+                    if profiler:
+                        metrics.save_cprofile(job_id, profiler)
+                    if sampler:
+                        sampler.stop()
+                        metrics.save_samples(job_id, sampler)
+                except OSError as e:
+                    logging.error(f"Could not save the profile of job {job_id}: {e}")
+                event = self._events.pop(job_id, None)
+                if event:
+                    event.set()
+                self._queue.task_done()
+
+    def _maybe_cleanup(self):
+        now = time.time()
+        if now - self._last_cleanup < CLEANUP_INTERVAL:
+            return
+        self._last_cleanup = now
+        removed = self.store.cleanup()
+        if removed:
+            logging.info(f"Removed {removed} expired job(s)")
@@ -1,21 +1,27 @@
 import os
+import glob
+import time
+import asyncio
 import threading
 import logging
 import json
-from uuid import uuid4
-from datetime import datetime
+import contextlib
 from fastapi import FastAPI, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse, PlainTextResponse, FileResponse
 from dotenv import load_dotenv
-from urllib.parse import urlparse, parse_qs
-from youtube_transcript_api import (
-    YouTubeTranscriptApi,
-    TranscriptsDisabled,
-    NoTranscriptFound,
-)
 
-from record import record_audio, capture_screen, stop_flag, AUDIO_FS
+from sessions import SessionManager
+from record import capture_available
+from catalog import SessionCatalog
+import metrics
+from jobs import JobQueue, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from youtube import TranscriptCache, TranscriptUnavailable, transcript_text
+from timeline import load_timeline
+import storage
+from storage import session_audio, media_type, SEGMENTS_FILE, OCR_COMBINED_FILE
+from search import SearchIndex, default_embedder, group_by_session
 
 load_dotenv()
 
@@ -27,9 +33,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Serve session files statically (for downloads/viewing)
+# Serve session files statically (for downloads/viewing; Range requests are supported for seeking)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-SESSIONS_DIR = os.path.join(BASE_DIR, "sessions")
+SESSIONS_DIR = os.getenv("SESSIONS_DIR", os.path.join(BASE_DIR, "sessions"))
 if not os.path.exists(SESSIONS_DIR):
     os.makedirs(SESSIONS_DIR, exist_ok=True)
 app.mount("/sessions", StaticFiles(directory=SESSIONS_DIR), name="sessions")
@@ -43,178 +49,678 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(message)s"
 )
 
-# Thread handles & job store
-audio_thread = None
-screen_thread = None
-jobs: dict[str, dict] = {}  # jobId -> {"status": "pending/done/error", "result": {...}}
+# Session index, per-session recorder state & job store
+catalog = SessionCatalog(SESSIONS_DIR)
+# Sessions still flagged as recording were cut off by a crash or restart; nothing records them now
+interrupted = catalog.reset_interrupted()
+if interrupted:
+    logging.warning(f"Marked {len(interrupted)} session(s) interrupted by a previous run as finished")
+job_queue = JobQueue()  # transcription, OCR and summarization jobs
+youtube_transcripts = TranscriptCache()
+search_index = SearchIndex(embed=default_embedder())
+
+def reindex(session):
+    """Refreshes the session's search entries after a transcript, OCR output or summary was written."""
+    job_queue.submit(
+        "search_index", lambda ctx: {"chunks": search_index.index_session(session)},
+        dedupe_key=f"search_index:{session}", priority=PRIORITY_LOW,
+    )
+
+def compact_sessions(ctx, session_dirs, audio_only=()):
+    """Compresses the audio and screenshots of finished sessions (inside a job); `audio_only` ids keep their images."""
+    reports = []
+    for i, session_dir in enumerate(session_dirs):
+        sid = os.path.basename(session_dir)
+        lock = session_manager.media_lock(sid)
+        # A transcription or OCR job is reading this session's media; a later sweep compacts it
+        if not lock.acquire(blocking=False):
+            reports.append({"session": sid, "skipped": "busy"})
+        else:
+            try:
+                reports.append(storage.compact_session(session_dir, images=sid not in audio_only))
+                catalog.sync(sid)
+                catalog.set_state(sid, compacted=True)
+            finally:
+                lock.release()
+        ctx.progress(i + 1, len(session_dirs))
+    return reports
+
+def on_session_finished(session):
+    # Recordings are indexed and compressed in the background once capture and streaming transcription end
+    reindex(session.dir)
+    if storage.STORAGE_COMPACT:
+        job_queue.submit(
+            "compact", lambda ctx: {"compacted": compact_sessions(ctx, [session.dir])},
+            dedupe_key=f"compact:{session.dir}", priority=PRIORITY_LOW,
+        )
+
+session_manager = SessionManager(SESSIONS_DIR, catalog, on_finished=on_session_finished)
+metrics.gauge_callback("job_queue_depth", job_queue.depth, "Jobs waiting for a worker")
+metrics.gauge_callback("jobs_running", job_queue.running, "Jobs currently running")
+metrics.gauge_callback("active_sessions", lambda: len(session_manager.active()), "Sessions currently recording")
+
+# Preload the Whisper model at startup so the first /transcribe skips the cold load
+WHISPER_WARMUP = os.getenv("WHISPER_WARMUP", "false").lower() in ("1", "true", "yes")
+# Transcribe in overlapping chunks during recording instead of after /stop-session
+STREAM_TRANSCRIPTION = os.getenv("STREAM_TRANSCRIPTION", "true").lower() in ("1", "true", "yes")
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template, not the raw path, to keep the series count bounded
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    metrics.observe("http_request_seconds", time.perf_counter() - start, route=route, method=request.method)
+    return response
+
+def storage_sweep():
+    """Compacts finished sessions still stored as WAV/PNG, then applies the retention limits."""
+    def job(ctx):
+        active = {s.id for s in session_manager.active()}
+        sessions = [
+            s for s in catalog.usage()
+            if storage.needs_compaction(s) and not s["recording"] and s["id"] not in active
+            and os.path.isdir(os.path.join(SESSIONS_DIR, s["id"]))
+        ]
+        pending = [os.path.join(SESSIONS_DIR, s["id"]) for s in sessions]
+        audio_only = {s["id"] for s in sessions if s["compacted"]}
+        compacted = compact_sessions(ctx, pending, audio_only) if storage.STORAGE_COMPACT else []
+        retention = storage.apply_retention(catalog, exclude=active, lock=session_manager.media_lock)
+        if storage.RETENTION_EVICT == "session":
+            for session_id in retention["evicted"]:
+                search_index.remove(session_id)
+        return {"compacted": compacted, **retention}
+
+    job_id, _ = job_queue.submit("storage_sweep", job, dedupe_key="storage_sweep", priority=PRIORITY_LOW)
+    return job_id
 
-# Global variable to hold the current session directory
-CURRENT_SESSION_DIR = None
+@app.on_event("startup")
+def index_sessions():
+    # One scan at startup picks up sessions recorded before the catalogue (or search index) existed;
+    # storage is then swept (compaction + retention) every STORAGE_SWEEP_HOURS
+    def run():
+        catalog.index_missing()
+        search_index.index_all(SESSIONS_DIR)
+        while storage.STORAGE_SWEEP_HOURS > 0:
+            storage_sweep()
+            time.sleep(storage.STORAGE_SWEEP_HOURS * 3600)
+            search_index.index_all(SESSIONS_DIR)
+
+    threading.Thread(target=run, name="CatalogIndex", daemon=True).start()
+
+@app.on_event("startup")
+def warm_up_models():
+    if not WHISPER_WARMUP:
+        return
+    from transcribe import warm_up  # import here so that transcribe is only needed when used
+    threading.Thread(target=warm_up, name="WhisperWarmup", daemon=True).start()
+    logging.info("Whisper warm-up started")
 
 @app.post("/start-session")
-def start_session():
-    global audio_thread, screen_thread, CURRENT_SESSION_DIR
-    stop_flag.clear()
-    # Create a new session directory for each recording session.
-    timestamp = datetime.now().strftime("session_%Y%m%d_%H%M%S")
-    CURRENT_SESSION_DIR = os.path.join(SESSIONS_DIR, timestamp)
+def start_session(audio_device: int | None = None, monitor: int = 1):
+    unavailable = capture_available()
+    if unavailable:
+        raise HTTPException(status_code=503, detail=unavailable)
+    # Each call records into its own session directory; running sessions are not affected
     try:
-        os.makedirs(CURRENT_SESSION_DIR, exist_ok=True)
-        logging.info(f"Session directory created at: {CURRENT_SESSION_DIR}")
+        session = session_manager.start(STREAM_TRANSCRIPTION, audio_device=audio_device, monitor=monitor)
     except Exception as e:
-        logging.error(f"Failed to create session directory: {e}")
+        logging.error(f"Failed to start session: {e}")
         raise HTTPException(status_code=500, detail="Failed to create session directory")
-    # Define the audio file path based on the new session directory.
-    audio_file = os.path.join(CURRENT_SESSION_DIR, "audio.wav")
-    
-    audio_thread = threading.Thread(target=record_audio, args=(audio_file,), name="AudioThread")
-    screen_thread = threading.Thread(target=capture_screen, args=(CURRENT_SESSION_DIR,), name="ScreenThread")
-    audio_thread.start()
-    screen_thread.start()
-    logging.info("▶️ Recording session started")
-    return {"message": "Session started", "session_folder": os.path.basename(CURRENT_SESSION_DIR)}
+    logging.info("▶️ Recording session %s started", session.id)
+    return {"message": "Session started", "session_folder": session.id, "session_id": session.id}
 
 @app.post("/stop-session")
-def stop_session():
-    global audio_thread, screen_thread
-    if not audio_thread or not screen_thread:
+def stop_session(session_id: str | None = None):
+    session = session_manager.get(session_id)
+    if not session or not session.recording:
         raise HTTPException(status_code=400, detail="No session in progress")
-    stop_flag.set()
-    logging.info("⏹️ Stop signal sent")
-    return {"message": "Stopping session"}
+    session.stop()
+    logging.info("⏹️ Stop signal sent to session %s", session.id)
+    return {"message": "Stopping session", "session_id": session.id}
 
 @app.get("/session-status")
-def session_status():
-    return {
-        "audio_alive": audio_thread.is_alive() if audio_thread else False,
-        "screen_alive": screen_thread.is_alive() if screen_thread else False,
+def session_status(session_id: str | None = None):
+    session = session_manager.get(session_id)
+    # Finished sessions are no longer held in memory; catalogued ones report as idle
+    if session_id and not session and not catalog.get(session_id, with_artifacts=False):
+        raise HTTPException(status_code=404, detail="Session not found")
+    status = session.status() if session else {
+        "session_folder": session_id,
+        "audio_alive": False,
+        "screen_alive": False,
+        "transcriber_alive": False,
+        "transcript_segments": 0,
+        "transcript_failed_chunks": 0,
+        "audio_capture": None,
     }
+    status["active_sessions"] = [s.id for s in session_manager.active()]
+    status["job_queue_depth"] = job_queue.depth()
+    return status
 
-def find_latest_session():
-    # If a current session exists, use it; otherwise, find the latest session directory in SESSIONS_DIR.
-    global CURRENT_SESSION_DIR
-    if CURRENT_SESSION_DIR and os.path.exists(CURRENT_SESSION_DIR):
-        return CURRENT_SESSION_DIR
-    sessions = sorted(os.listdir(SESSIONS_DIR))
-    if not sessions:
-        raise HTTPException(status_code=404, detail="No sessions found")
-    return os.path.join(SESSIONS_DIR, sessions[-1])
+def find_latest_session(session_id: str | None = None):
+    # The requested session, else the latest one started here, else the newest directory in SESSIONS_DIR.
+    try:
+        return session_manager.resolve(session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Session not found" if session_id else "No sessions found")
 
 @app.post("/transcribe")
-def transcribe_session():
-    session = find_latest_session()
-    audio_path = os.path.join(session, "audio.wav")
-    from transcribe import transcribe  # import here so that transcribe is only needed when used
-    text = transcribe(audio_path)
+def transcribe_session(session_id: str | None = None, wait: bool = True, force: bool = False):
+    """Transcribes the session; a transcript newer than the recording (e.g. a finished streamed one) is reused unless force."""
+    session = find_latest_session(session_id)
     out_path = os.path.join(session, "transcript.txt")
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(text)
-    logging.info("✅ Transcription done (%d characters)", len(text))
-    return {"transcript": text, "session_folder": os.path.basename(session)}
+    transcriber = session_manager.transcriber_for(session)
+
+    def job(ctx):
+        # Streamed chunks that failed left gaps in transcript.txt; decode the whole recording instead
+        incomplete = transcriber is not None and transcriber.failed_chunks > 0
+        if transcriber and not incomplete:
+            # Chunks were transcribed during recording; the job is queued once the tail has landed
+            with open(out_path, "r", encoding="utf-8") as f:
+                text = f.read().strip()
+            logging.info("✅ Streaming transcription collected (%d characters)", len(text))
+        else:
+            # import here so that transcribe is only needed when used
+            from transcribe import transcribe_segments, write_transcript, transcript_up_to_date
+            # Held so compaction cannot replace audio.wav between resolving and decoding it
+            with session_manager.media_lock(session):
+                audio_path = session_audio(session)
+                if not audio_path:
+                    raise FileNotFoundError(f"No recording in {os.path.basename(session)}")
+                if not force and not incomplete and transcript_up_to_date(audio_path):
+                    with open(out_path, "r", encoding="utf-8") as f:
+                        text = f.read().strip()
+                    logging.info("✅ Existing transcript reused (%d characters)", len(text))
+                else:
+                    text = write_transcript(session, transcribe_segments(audio_path))
+                    logging.info("✅ Transcription done (%d characters)", len(text))
+        catalog.record_artifact(os.path.basename(session), "transcript.txt")
+        catalog.set_state(os.path.basename(session), transcribed=True)
+        reindex(session)
+        return {"transcript": text, "session_folder": os.path.basename(session)}
+
+    job_id, _ = job_queue.submit(
+        "transcribe", job, dedupe_key=f"transcribe:{session}:{force}", priority=PRIORITY_HIGH,
+        after=transcriber.join if transcriber else None,
+    )
+    if not wait:
+        return {"jobId": job_id}
+    finished = job_queue.wait(job_id)
+    if finished["status"] != "done":
+        raise HTTPException(status_code=500, detail=f"Transcription failed: {finished['result']}")
+    return {**finished["result"], "jobId": job_id}
+
+@app.post("/transcribe/batch")
+def transcribe_batch_sessions(
+    session_ids: list[str] | None = Query(None),
+    pattern: str | None = None,
+    force: bool = False,
+    workers: int | None = None,
+):
+    """Transcribes many sessions (by id or a glob over session names) in one job with one model load."""
+    if session_ids:
+        sessions = [find_latest_session(sid) for sid in session_ids]
+    elif pattern:
+        if "/" in pattern or os.sep in pattern or ".." in pattern:
+            raise HTTPException(status_code=400, detail="Pattern must match session names only")
+        sessions = sorted(p for p in glob.glob(os.path.join(glob.escape(SESSIONS_DIR), pattern)) if os.path.isdir(p))
+    else:
+        raise HTTPException(status_code=400, detail="Pass session_ids or pattern")
+
+    recording = {s.id for s in session_manager.active()}
+    audio_paths = [
+        session_audio(session) for session in sessions
+        if os.path.basename(session) not in recording and session_audio(session)
+    ]
+    if not audio_paths:
+        raise HTTPException(status_code=404, detail="No finished recordings matched")
+    names = [os.path.basename(os.path.dirname(path)) for path in audio_paths]
+
+    def job(ctx):
+        from transcribe import transcribe_batch  # import here so that transcribe is only needed when used
+
+        def on_file(row):
+            if row["status"] == "done":
+                catalog.record_artifact(row["session"], "transcript.txt")
+                catalog.set_state(row["session"], transcribed=True)
+                reindex(os.path.dirname(row["audio"]))
+
+        session_dirs = sorted(os.path.dirname(path) for path in audio_paths)
+        with contextlib.ExitStack() as held:
+            # Sorted so two batches over overlapping sessions cannot deadlock; paths are resolved again
+            # under the locks because compaction may have replaced audio.wav since the request
+            for session_dir in session_dirs:
+                held.enter_context(session_manager.media_lock(session_dir))
+            paths = [path for path in map(session_audio, session_dirs) if path]
+            report = transcribe_batch(paths, workers=workers, force=force, progress=ctx.progress, on_file=on_file)
+        for row in report["files"]:
+            row.pop("audio")  # server paths stay on the server
+        logging.info(
+            "✅ Batch transcription: %d done, %d skipped, %d failed",
+            report["transcribed"], report["skipped"], report["errors"],
+        )
+        return report
+
+    job_id, _ = job_queue.submit(
+        "transcribe_batch", job, dedupe_key=f"transcribe_batch:{force}:{','.join(names)}", priority=PRIORITY_LOW
+    )
+    return {"jobId": job_id, "sessions": names}
+
+@app.get("/transcript-stream")
+def transcript_stream(session_id: str | None = None, since: int = 0):
+    """Server-sent events carrying transcript segments as the live session is transcribed."""
+    session = session_manager.get(session_id)
+    transcriber = session.transcriber if session else None
+    if not transcriber:
+        raise HTTPException(status_code=404, detail="No streaming transcription in progress")
+
+    def events():
+        for segment in transcriber.iter_segments(since):
+            if segment is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"data: {json.dumps(segment, ensure_ascii=False)}\n\n"
+        yield "event: end\ndata: {}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.get("/transcribe/stats")
+def transcribe_stats():
+    from transcribe import model_cache_stats
+    return model_cache_stats()
 
 @app.post("/ocr")
-def ocr_session():
-    session = find_latest_session()
-    results = []
-    from ocr import ocr_image  # import here
-    for fname in sorted(os.listdir(session)):
-        if fname.endswith(".png"):
-            path = os.path.join(session, fname)
-            text = ocr_image(path)
-            results.append({fname: text})
-            with open(os.path.join(session, f"ocr_{fname}.txt"), "w", encoding="utf-8") as of:
-                of.write(text)
-    logging.info("✅ OCR done (%d images)", len(results))
-    return {"ocr_results": results, "session_folder": os.path.basename(session)}
+def ocr_session(session_id: str | None = None):
+    session = find_latest_session(session_id)
+    sid = os.path.basename(session)
+    entry = catalog.get(sid, with_artifacts=False)
+    if not entry or entry["recording"]:
+        catalog.sync(sid)  # still being written (or never indexed): refresh this session only
+    images = [a["name"] for a in catalog.artifacts(sid, kind="screenshot")]
+
+    def job(ctx):
+        from ocr import ocr_batch  # import here
+        # Held so compaction cannot convert or rename the screenshots while they are read; the list is
+        # taken again under the lock since a compaction may have run after the request
+        with session_manager.media_lock(session):
+            catalog.sync(sid)
+            artifacts = catalog.artifacts(sid)
+            names = {a["name"] for a in artifacts}
+            images = [a["name"] for a in artifacts if a["kind"] == "screenshot"]
+            # Images that already have an ocr_*.txt were processed by an earlier run
+            todo = [fname for fname in images if f"ocr_{fname}.txt" not in names]
+            skipped = len(images) - len(todo)
+            ctx.progress(skipped, len(images))
+            texts = ocr_batch(
+                [os.path.join(session, fname) for fname in todo],
+                progress=lambda done, total: ctx.progress(skipped + done, len(images)),
+            )
+            results = []
+            for fname in images:
+                out_path = os.path.join(session, f"ocr_{fname}.txt")
+                if fname in todo:
+                    text = texts.get(os.path.join(session, fname), "")
+                    with open(out_path, "w", encoding="utf-8") as of:
+                        of.write(text)
+                else:
+                    with open(out_path, "r", encoding="utf-8") as of:
+                        text = of.read()
+                results.append({fname: text})
+            # One consolidated file so /summarize does not have to open every ocr_*.txt
+            with open(os.path.join(session, OCR_COMBINED_FILE), "w", encoding="utf-8") as of:
+                of.write("\n\n".join(text for result in results for text in result.values()))
+            catalog.sync(sid)
+        catalog.set_state(sid, ocr_done=True)
+        reindex(session)
+        logging.info("✅ OCR done (%d images, %d already processed)", len(results), skipped)
+        return {"ocr_results": results, "session_folder": os.path.basename(session)}
+
+    job_id, _ = job_queue.submit("ocr", job, dedupe_key=f"ocr:{session}", priority=PRIORITY_LOW)
+    return {"jobId": job_id, "images": len(images), "session_folder": os.path.basename(session)}
+
+def save_youtube_transcript(session, entry):
+    transcript = transcript_text(entry["segments"])
+    transcript_path = os.path.join(session, "transcript.txt")
+    with open(transcript_path, "w", encoding="utf-8") as f:
+        f.write(transcript)
+    # Keep the caption timings for the session timeline
+    with open(os.path.join(session, SEGMENTS_FILE), "w", encoding="utf-8") as f:
+        for seg in entry["segments"]:
+            seg = {"start": seg["start"], "end": round(seg["start"] + seg["duration"], 2), "text": seg["text"]}
+            f.write(json.dumps(seg, ensure_ascii=False) + "\n")
+    logging.info("✅ Transcript saved to %s", transcript_path)
+    catalog.record_artifact(os.path.basename(session), "transcript.txt")
+    catalog.set_state(os.path.basename(session), transcribed=True)
+    reindex(session)
+    return transcript
 
 @app.get("/youtube-transcript")
-def youtube_transcript(videoURL: str = Query(..., alias="videoURL")):
+def youtube_transcript(
+    videoURL: str = Query(..., alias="videoURL"),
+    session_id: str | None = None,
+    languages: list[str] | None = Query(None),
+):
     """
-    Fetches the transcript for a given YouTube video URL.
+    Fetches the transcript for a given YouTube video URL (cached per video and language).
     Saves the transcript into the current session folder.
     """
     if not videoURL:
         raise HTTPException(status_code=400, detail="Missing YouTube video URL")
     try:
-        # Use urllib.parse to extract the video ID from the URL reliably.
-        parsed_url = urlparse(videoURL)
-        query_params = parse_qs(parsed_url.query)
-        video_ids = query_params.get("v")
-        if not video_ids:
-            raise HTTPException(status_code=400, detail="Invalid YouTube video URL; missing 'v' parameter.")
-        video_id = video_ids[0]
-
-        transcript_data = YouTubeTranscriptApi.get_transcript(video_id)
-        full_transcript = "\n".join(segment["text"] for segment in transcript_data)
-        logging.info("✅ YouTube transcript retrieved for video_id %s", video_id)
-
-        # Use the CURRENT_SESSION_DIR if available, otherwise use the latest session.
-        session = CURRENT_SESSION_DIR if CURRENT_SESSION_DIR else find_latest_session()
+        entry = youtube_transcripts.get(videoURL, languages)
+        logging.info("✅ YouTube transcript retrieved for video_id %s (cached: %s)", entry["video_id"], entry["cached"])
+
+        # Use the requested session if given, otherwise the latest session.
+        session = find_latest_session(session_id)
         if not os.path.exists(session):
             logging.error("Session directory '%s' does not exist.", session)
             os.makedirs(session, exist_ok=True)
             logging.info("Session directory '%s' created.", session)
 
-        transcript_path = os.path.join(session, "transcript.txt")
-        with open(transcript_path, "w", encoding="utf-8") as f:
-            f.write(full_transcript)
-        logging.info("✅ Transcript saved to %s", transcript_path)
-
-        return {"transcript": full_transcript}
-    except (TranscriptsDisabled, NoTranscriptFound):
+        full_transcript = save_youtube_transcript(session, entry)
+        return {"transcript": full_transcript, "video_id": entry["video_id"], "cached": entry["cached"]}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TranscriptUnavailable:
         raise HTTPException(status_code=404, detail="Transcript not available for this video.")
     except Exception as e:
         logging.exception("Failed to process YouTube transcript for URL: %s", videoURL)
         raise HTTPException(status_code=500, detail="Failed to process transcript.") from e
 
+@app.post("/youtube-transcripts")
+def ingest_youtube_transcripts(
+    urls: list[str] = Query(..., max_length=200),
+    languages: list[str] | None = Query(None),
+):
+    """Bulk-ingests videos (e.g. a course playlist): each transcript goes into a new session of its own."""
+    urls = list(dict.fromkeys(url.strip() for url in urls if url.strip()))
+    if not urls:
+        raise HTTPException(status_code=400, detail="Missing YouTube video URLs")
+
+    def job(ctx):
+        done = []
+        lock = threading.Lock()
+
+        def on_result(index, entry):
+            if entry["ok"]:
+                session = session_manager.create_dir()
+                catalog.register(os.path.basename(session))
+                save_youtube_transcript(session, entry)
+                entry["session_id"] = os.path.basename(session)
+            with lock:
+                done.append(index)
+                ctx.progress(len(done), len(urls))
+
+        results = youtube_transcripts.bulk(urls, languages, on_result=on_result)
+        videos = [
+            {key: entry[key] for key in ("url", "video_id", "ok", "error", "cached", "session_id") if key in entry}
+            for entry in results
+        ]
+        logging.info("✅ YouTube ingest: %d of %d videos", sum(v["ok"] for v in videos), len(videos))
+        return {"videos": videos}
+
+    job_id, _ = job_queue.submit(
+        "youtube_ingest", job, dedupe_key=f"youtube_ingest:{','.join(urls)}", priority=PRIORITY_NORMAL
+    )
+    return {"jobId": job_id, "videos": len(urls)}
+
+@app.get("/catalog")
+def list_sessions(offset: int = 0, limit: int = Query(20, ge=1, le=200), q: str | None = None, state: str | None = None):
+    """Pages through catalogued sessions, newest first; `state` is one of recording/transcribed/ocr_done/summarized/compacted."""
+    try:
+        return catalog.list(offset=offset, limit=limit, q=q, state=state)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/catalog/{session_id}")
+def get_session(session_id: str):
+    session = catalog.get(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
 @app.post("/summarize")
-def start_summarization(request: Request):
-    session = find_latest_session()
+def start_summarization(
+    request: Request,
+    session_id: str | None = None,
+    refresh: bool = False,
+    start: float | None = Query(None, ge=0),
+    end: float | None = Query(None, gt=0),
+):
+    """Summarizes the session, or only the [start, end) seconds of it when a window is given."""
+    session = find_latest_session(session_id)
+    windowed = start is not None or end is not None
+    if windowed and start is not None and end is not None and end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if windowed and not os.path.exists(os.path.join(session, "transcript.txt")):
+        raise HTTPException(status_code=400, detail="Transcribe the session before summarizing a time window")
+    dedupe_key = f"summarize:{session}" + (f":{start or 0:g}-{end if end is not None else 'end'}" if windowed else "")
+    # A second click while this session is being summarized joins the running job
+    in_flight = job_queue.store.find_active(dedupe_key)
+    if in_flight:
+        return {"jobId": in_flight, "cached": False}
+
     transcript_file = os.path.join(session, "transcript.txt")
-    from transcribe import transcribe  # in case transcription is needed
-    if os.path.exists(transcript_file):
-        with open(transcript_file, "r", encoding="utf-8") as f:
-            text = f.read()
-    else:
-        audio_path = os.path.join(session, "audio.wav")
-        text = transcribe(audio_path)
-    
-    # Load OCR texts
-    ocr_texts = []
-    for fname in sorted(os.listdir(session)):
-        if fname.startswith("ocr_") and fname.endswith(".txt"):
-            with open(os.path.join(session, fname), "r", encoding="utf-8") as of:
-                ocr_texts.append(of.read())
-    
-    combined = text + "\n\n" + "\n\n".join(ocr_texts)
-    logging.info("Starting summarization job for session '%s', %d characters", session, len(combined))
-    
-    job_id = uuid4().hex
-    jobs[job_id] = {"status": "pending", "result": None}
-
-    def worker():
+    out_json = os.path.join(session, "summary.json")
+    transcriber = session_manager.transcriber_for(session)
+    import summary_cache
+    from summarize import summarize, summary_cache_key  # import here to perform summarization
+
+    def load_input():
+        if windowed:
+            window = load_timeline(session).window(start or 0.0, end if end is not None else float("inf"))
+            return window["transcript"] + "\n\n" + window["slide_text"]
+        if os.path.exists(transcript_file):
+            with open(transcript_file, "r", encoding="utf-8") as f:
+                text = f.read()
+        else:
+            from transcribe import transcribe  # in case transcription is needed
+            text = transcribe(session_audio(session))
+
+        # Load OCR texts: the consolidated file written by /ocr, else the per-image files of older sessions
         try:
-            from summarize import summarize  # import here to perform summarization
-            structured = summarize(combined)
-            out_json = os.path.join(session, "summary.json")
-            with open(out_json, "w", encoding="utf-8") as f:
-                json.dump(structured, f, ensure_ascii=False, indent=2)
-            jobs[job_id].update(status="done", result=structured)
-            logging.info("✅ Summarization job %s done", job_id)
-        except Exception as e:
-            jobs[job_id].update(status="error", result=str(e))
-            logging.exception("Summarization job %s failed", job_id)
-    
-    threading.Thread(target=worker, daemon=True).start()
-    return {"jobId": job_id}
+            with open(os.path.join(session, OCR_COMBINED_FILE), "r", encoding="utf-8") as of:
+                ocr_text = of.read()
+        except FileNotFoundError:
+            ocr_texts = []
+            for fname in sorted(os.listdir(session)):
+                if fname.startswith("ocr_") and fname.endswith(".txt"):
+                    with open(os.path.join(session, fname), "r", encoding="utf-8") as of:
+                        ocr_texts.append(of.read())
+            ocr_text = "\n\n".join(ocr_texts)
+        return text + "\n\n" + ocr_text
+
+    def save(structured):
+        if windowed:
+            return  # window summaries live in the job result and the summary cache only
+        with open(out_json, "w", encoding="utf-8") as f:
+            json.dump(structured, f, ensure_ascii=False, indent=2)
+        sid = os.path.basename(session)
+        catalog.record_artifact(sid, "summary.json")
+        overview = structured.get("overview") if isinstance(structured, dict) else None
+        catalog.set_state(sid, summarized=True, overview=overview if isinstance(overview, str) else None)
+        reindex(session)
+
+    # Same input, model and prompts as an earlier run: reuse that summary (?refresh=true bypasses).
+    # While the session is still being transcribed its input is not final, so the job looks it up instead.
+    live = transcriber is not None and transcriber.is_alive()
+    preloaded = None
+    if not refresh and not live and os.path.exists(transcript_file):
+        preloaded = load_input()
+        cached = summary_cache.get(summary_cache_key(preloaded))
+        if cached is not None:
+            save(cached)
+            logging.info("✅ Summary for session '%s' served from cache", session)
+            return {"jobId": job_queue.record("summarize", cached, dedupe_key), "cached": True}
+
+    def job(ctx):
+        combined = preloaded if preloaded is not None else load_input()
+        if preloaded is None and not refresh:
+            cached = summary_cache.get(summary_cache_key(combined))
+            if cached is not None:
+                save(cached)
+                logging.info("✅ Summary for session '%s' served from cache", session)
+                return cached
+        logging.info("Starting summarization job for session '%s', %d characters", session, len(combined))
+        structured = summarize(combined, on_field=ctx.partial)
+        save(structured)
+        if structured and "raw" not in structured:
+            summary_cache.put(summary_cache_key(combined), structured)
+        return structured
+
+    # During a live session the job waits (off the worker pool) for the last streamed chunk to land
+    job_id, _ = job_queue.submit(
+        "summarize", job, dedupe_key=dedupe_key, priority=PRIORITY_NORMAL,
+        after=transcriber.join if live else None,
+    )
+    return {"jobId": job_id, "cached": False}
+
+@app.get("/timeline")
+def session_timeline(
+    session_id: str | None = None,
+    start: float = Query(0.0, ge=0),
+    end: float | None = Query(None, gt=0),
+):
+    """Transcript segments and slides (with their OCR text) for a time window of the session, in seconds."""
+    session = find_latest_session(session_id)
+    if end is not None and end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    timeline = load_timeline(session)
+    window = timeline.window(start, end if end is not None else float("inf"))
+    return {**window, "duration": round(timeline.duration, 2), "session_folder": os.path.basename(session)}
+
+@app.get("/search")
+def search_sessions(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    mode: str | None = None,
+    kind: str | None = None,
+):
+    """Finds transcript windows, slides and summaries across all sessions matching `q`.
+
+    mode is keyword, semantic or hybrid (semantic needs SEARCH_EMBEDDINGS=true); kind is
+    transcript, slide or summary. Each hit carries its session id and start/end offsets in seconds.
+    """
+    start = time.perf_counter()
+    try:
+        hits = search_index.search(q, limit=limit, mode=mode, kind=kind)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:  # OllamaError: the embedding model is unreachable
+        logging.error(f"Search for {q!r} failed: {e}")
+        raise HTTPException(status_code=503, detail="Search failed")
+    return {
+        "query": q,
+        "hits": hits,
+        "sessions": group_by_session(hits),
+        "took_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+@app.get("/search/stats")
+def search_stats():
+    return search_index.stats()
+
+@app.get("/audio")
+def session_recording(session_id: str | None = None):
+    """The session's recording (WAV, FLAC or Opus); supports Range requests so players can seek."""
+    session = find_latest_session(session_id)
+    path = session_audio(session)
+    if not path:
+        raise HTTPException(status_code=404, detail="No recording for this session")
+    return FileResponse(path, media_type=media_type(path))
+
+@app.get("/storage")
+def storage_usage():
+    """Disk used by the catalogued sessions, how much of it is media, and the retention settings."""
+    sessions = catalog.usage()
+    return {
+        "sessions": len(sessions),
+        "total_bytes": sum(s["size"] for s in sessions),
+        "media_bytes": sum(s["media"] for s in sessions),
+        "uncompressed_sessions": sum(1 for s in sessions if s["uncompressed"]),
+        "pending_compaction": sum(1 for s in sessions if storage.needs_compaction(s)),
+        "compact": storage.STORAGE_COMPACT,
+        "audio_format": storage.STORAGE_AUDIO_FORMAT,
+        "retention": {
+            "max_age_days": storage.RETENTION_MAX_AGE_DAYS,
+            "max_total_mb": storage.RETENTION_MAX_TOTAL_MB,
+            "evict": storage.RETENTION_EVICT,
+        },
+    }
+
+@app.post("/storage/sweep")
+def run_storage_sweep():
+    """Compacts pending sessions and applies retention now instead of at the next scheduled sweep."""
+    return {"jobId": storage_sweep()}
 
 @app.get("/summary/{job_id}")
 def get_summary(job_id: str):
-    job = jobs.get(job_id)
+    job = job_queue.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     return job
 
+@app.get("/summary/{job_id}/stream")
+async def stream_summary(job_id: str):
+    """Server-sent events: one `field` event per summary field as it completes, then `done` or `error`."""
+    if not job_queue.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        sent = set()
+        while True:
+            job = await asyncio.to_thread(job_queue.get, job_id)
+            partial = job.get("partial") or {}
+            for key in list(partial):
+                if key not in sent:
+                    sent.add(key)
+                    payload = {"key": key, "value": partial[key]}
+                    yield f"event: field\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+            if job["status"] in ("done", "error"):
+                yield f"event: {job['status']}\ndata: {json.dumps(job['result'], ensure_ascii=False)}\n\n"
+                return
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    return get_summary(job_id)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Counters, gauges and latency histograms of every pipeline stage in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/jobs/{job_id}/profile")
+def profile_job(job_id: str, mode: str = "cprofile"):
+    """Profiles one job (JOB_PROFILING=true): mode=cprofile for pending jobs, mode=sample also for running ones."""
+    if not metrics.JOB_PROFILING:
+        raise HTTPException(status_code=403, detail="Profiling is disabled (set JOB_PROFILING=true)")
+    try:
+        state = job_queue.profile(job_id, mode)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"jobId": job_id, "mode": mode, "state": state}
+
+@app.get("/jobs/{job_id}/profile", response_class=PlainTextResponse)
+def get_job_profile(job_id: str):
+    """The saved profile report: pstats text (cprofile) or collapsed stacks (sample)."""
+    if not metrics.JOB_PROFILING:
+        raise HTTPException(status_code=403, detail="Profiling is disabled (set JOB_PROFILING=true)")
+    path = metrics.profile_path(os.path.basename(job_id), "txt")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="No profile for this job (yet)")
+    with open(path, "r", encoding="utf-8") as f:
+        return PlainTextResponse(f.read())
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
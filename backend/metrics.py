@@ -0,0 +1,203 @@
+import os
+import sys
+import time
+import pstats
+import logging
+import threading
+from io import StringIO
+from collections import Counter
+from contextlib import contextmanager
+
+# Process-wide counters, gauges and histograms, rendered in the Prometheus text format at /metrics.
+# Label values must stay low-cardinality (stage, backend, model, kind, status), never ids or paths.
+METRICS_PREFIX = "suma_"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+RATIO_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 5)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Opt-in per-job profiling (cProfile or stack sampling) written to PROFILE_DIR
+JOB_PROFILING = os.getenv("JOB_PROFILING", "false").lower() in ("1", "true", "yes")
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"))
+# Job kinds (e.g. "summarize,ocr") profiled with cProfile on every run while JOB_PROFILING is on
+PROFILE_JOB_KINDS = {k.strip() for k in os.getenv("PROFILE_JOB_KINDS", "").split(",") if k.strip()}
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", 0.01))  # seconds between stack samples
+
+_lock = threading.Lock()
+_help = {}
+_types = {}
+_values = {}  # (name, labels) -> float for counters and gauges
+_histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+_buckets = {}
+_callbacks = {}  # gauge name -> fn() evaluated at scrape time
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _declare(name, kind, doc):
+    if name not in _types:
+        _types[name] = kind
+        _help[name] = doc or name.replace("_", " ")
+
+def inc(name: str, value: float = 1, doc: str = None, **labels):
+    """Adds `value` to a counter."""
+    with _lock:
+        _declare(name, "counter", doc)
+        key = _key(name, labels)
+        _values[key] = _values.get(key, 0.0) + value
+
+def set_gauge(name: str, value: float, doc: str = None, **labels):
+    with _lock:
+        _declare(name, "gauge", doc)
+        _values[_key(name, labels)] = float(value)
+
+def gauge_callback(name: str, fn, doc: str = None):
+    """Registers a gauge read at scrape time; `fn()` returns a number or {labels tuple: number}."""
+    with _lock:
+        _declare(name, "gauge", doc)
+        _callbacks[name] = fn
+
+def observe(name: str, value: float, buckets=DEFAULT_BUCKETS, doc: str = None, **labels):
+    """Records one observation in a histogram."""
+    with _lock:
+        _declare(name, "histogram", doc)
+        bounds = _buckets.setdefault(name, tuple(buckets))
+        key = _key(name, labels)
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * len(bounds) + [0.0, 0]
+        for i, bound in enumerate(bounds):
+            if value <= bound:
+                hist[i] += 1
+        hist[-2] += value
+        hist[-1] += 1
+
+@contextmanager
+def timer(name: str, doc: str = None, **labels):
+    """Observes the duration of the block in seconds (also when it raises)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, doc=doc, **labels)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(pairs, extra=()):
+    pairs = list(pairs) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _fmt(value):
+    return repr(float(value)) if value != int(value) or abs(value) >= 1e15 else str(int(value))
+
+def render() -> str:
+    """Returns all metrics in the Prometheus text exposition format."""
+    with _lock:
+        values = dict(_values)
+        histograms = {key: list(hist) for key, hist in _histograms.items()}
+        callbacks = dict(_callbacks)
+        types, helps, buckets = dict(_types), dict(_help), dict(_buckets)
+    for name, fn in callbacks.items():
+        try:
+            result = fn()
+        except Exception as e:
+            logging.warning(f"Metric callback {name} failed: {e}")
+            continue
+        if isinstance(result, dict):
+            for labels, value in result.items():
+                values[(name, tuple(labels))] = value
+        elif result is not None:
+            values[(name, ())] = result
+
+    lines = []
+    for name in sorted(types):
+        full = METRICS_PREFIX + name
+        lines.append(f"# HELP {full} {helps[name]}")
+        lines.append(f"# TYPE {full} {types[name]}")
+        if types[name] == "histogram":
+            for (metric, labels), hist in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, count in zip(buckets[name], hist):
+                    lines.append(f"{full}_bucket{_labels(labels, [('le', _fmt(bound))])} {count}")
+                lines.append(f"{full}_bucket{_labels(labels, [('le', '+Inf')])} {hist[-1]}")
+                lines.append(f"{full}_sum{_labels(labels)} {_fmt(hist[-2])}")
+                lines.append(f"{full}_count{_labels(labels)} {hist[-1]}")
+        else:
+            for (metric, labels), value in sorted(values.items()):
+                if metric == name:
+                    lines.append(f"{full}{_labels(labels)} {_fmt(value)}")
+    return "\n".join(lines) + "\n"
+
+def _memory():
+    """Current RSS in bytes (Linux), else the peak RSS."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+gauge_callback("process_resident_memory_bytes", _memory, "Resident memory of the backend process")
+gauge_callback("process_threads", threading.active_count, "Live Python threads")
+
+# --- per-job profiling ------------------------------------------------------------------------
+
+class StackSampler:
+    """Samples one thread's Python stack every `interval` seconds into collapsed-stack counts."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="StackSampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def report(self) -> str:
+        """Collapsed stacks ("frame;frame;frame count"), the input format of flamegraph tools."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+def profile_path(job_id: str, suffix: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{job_id}.{suffix}")
+
+def save_cprofile(job_id: str, profiler, limit: int = 60):
+    """Writes <job_id>.prof (for snakeviz / pstats) and a text report sorted by cumulative time."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profiler.dump_stats(profile_path(job_id, "prof"))
+    out = StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    with open(profile_path(job_id, "txt"), "w", encoding="utf-8") as f:
+        f.write(out.getvalue())
+    logging.info(f"Saved cProfile of job {job_id}")
+
+def save_samples(job_id: str, sampler: StackSampler):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(profile_path(job_id, "txt"), "w", encoding="utf-8") as f:
+        f.write(sampler.report())
+    logging.info(f"Saved {sum(sampler.stacks.values())} stack samples of job {job_id}")
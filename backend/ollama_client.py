@@ -0,0 +1,261 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+import metrics
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+load_dotenv()
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:latest")
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", 300))
+OLLAMA_RETRIES = int(os.getenv("OLLAMA_RETRIES", 3))
+OLLAMA_BACKOFF = float(os.getenv("OLLAMA_BACKOFF", 1.0))  # seconds, doubled per attempt
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # how long Ollama keeps the model loaded
+OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", 8))
+
+class OllamaError(RuntimeError):
+    pass
+
+def _messages(prompt: str, partial: str) -> list:
+    messages = [{"role": "user", "content": prompt}]
+    if partial:
+        # Ollama continues a trailing assistant message, so a retry resumes where the stream broke
+        messages.append({"role": "assistant", "content": partial})
+    return messages
+
+def _parse_line(line):
+    """Returns (token, done) for one NDJSON line of a streamed /api/chat response."""
+    obj = json.loads(line)
+    if obj.get("error"):
+        raise OllamaError(obj["error"])
+    return obj.get("message", {}).get("content", ""), bool(obj.get("done"))
+
+def _retryable(exc) -> bool:
+    status = None
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+    elif httpx is not None and isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+    # Client errors (unknown model, bad request) will not succeed on retry
+    return status is None or status >= 500 or status == 429
+
+class _Timing:
+    """Time to first token and decode rate of one generation, reported to metrics when it ends."""
+
+    def __init__(self, model):
+        self.model = model
+        self.start = time.perf_counter()
+        self.first = None
+        self.tokens = 0
+
+    def token(self):
+        if self.first is None:
+            self.first = time.perf_counter()
+            metrics.observe("llm_ttft_seconds", self.first - self.start, doc="Time to first token", model=self.model)
+        self.tokens += 1
+
+    def finish(self, status):
+        end = time.perf_counter()
+        metrics.inc("llm_requests_total", model=self.model, status=status)
+        metrics.observe("llm_request_seconds", end - self.start, doc="Full generation time", model=self.model)
+        metrics.inc("llm_tokens_total", self.tokens, doc="Streamed tokens (chunks)", model=self.model)
+        if self.first is not None and self.tokens > 1 and end > self.first:
+            metrics.observe(
+                "llm_tokens_per_second", (self.tokens - 1) / (end - self.first), metrics.RATE_BUCKETS,
+                doc="Decode rate after the first token", model=self.model,
+            )
+
+class OllamaClient:
+    """Ollama /api/chat client over a pooled keep-alive session, with resuming retries."""
+
+    def __init__(self, base_url=OLLAMA_URL, model=OLLAMA_MODEL, keep_alive=OLLAMA_KEEP_ALIVE,
+                 retries=OLLAMA_RETRIES, backoff=OLLAMA_BACKOFF, timeout=OLLAMA_TIMEOUT, pool_size=OLLAMA_POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.keep_alive = keep_alive
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _payload(self, prompt, partial, model):
+        return {
+            "model": model or self.model,
+            "messages": _messages(prompt, partial),
+            "stream": True,
+            "keep_alive": self.keep_alive,
+        }
+
+    def generate(self, prompt: str, on_token=None, model: str = None) -> str:
+        """Streams a completion for the prompt; `on_token(token)` sees each piece as it arrives."""
+        timing = _Timing(model or self.model)
+        try:
+            text = self._generate(prompt, on_token, model, timing)
+        except OllamaError:
+            timing.finish("error")
+            raise
+        timing.finish("ok")
+        return text
+
+    def _generate(self, prompt, on_token, model, timing):
+        parts = []
+        for attempt in range(self.retries + 1):
+            try:
+                with self.session.post(
+                    f"{self.base_url}/api/chat",
+                    json=self._payload(prompt, "".join(parts), model),
+                    stream=True,
+                    timeout=self.timeout,
+                ) as resp:
+                    resp.raise_for_status()
+                    finished = False
+                    # Read to the end of the body so the connection goes back to the pool
+                    for line in resp.iter_lines():
+                        if not line or finished:
+                            continue
+                        token, finished = _parse_line(line)
+                        if token:
+                            parts.append(token)
+                            timing.token()
+                            if on_token:
+                                on_token(token)
+                if finished:
+                    return "".join(parts)
+                raise OllamaError("stream ended before completion")
+            except (requests.RequestException, ValueError, OllamaError) as e:
+                if attempt >= self.retries or not _retryable(e):
+                    raise OllamaError(f"Ollama request failed after {attempt + 1} attempt(s): {e}") from e
+                delay = self.backoff * 2 ** attempt
+                logging.warning(f"Ollama request failed ({e}); retrying in {delay:.1f}s with {len(parts)} tokens kept")
+                time.sleep(delay)
+
+    def embed(self, texts, model: str) -> list:
+        """Embeds each text with the embedding `model` (/api/embed); returns one vector per text."""
+        for attempt in range(self.retries + 1):
+            try:
+                with metrics.timer("llm_embed_seconds", doc="Embedding request time", model=model):
+                    resp = self.session.post(
+                        f"{self.base_url}/api/embed",
+                        json={"model": model, "input": list(texts), "keep_alive": self.keep_alive},
+                        timeout=self.timeout,
+                    )
+                    resp.raise_for_status()
+                    body = resp.json()
+                if body.get("error"):
+                    raise OllamaError(body["error"])
+                embeddings = body.get("embeddings") or []
+                if len(embeddings) != len(texts):
+                    raise OllamaError(f"expected {len(texts)} embeddings, got {len(embeddings)}")
+                return embeddings
+            except (requests.RequestException, ValueError, OllamaError) as e:
+                if attempt >= self.retries or not _retryable(e):
+                    raise OllamaError(f"Ollama embedding failed after {attempt + 1} attempt(s): {e}") from e
+                delay = self.backoff * 2 ** attempt
+                logging.warning(f"Ollama embedding failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def close(self):
+        self.session.close()
+
+class AsyncOllamaClient:
+    """asyncio counterpart of OllamaClient for use directly in FastAPI handlers.
+
+    Uses httpx when installed; otherwise runs the pooled sync client in a thread.
+    """
+
+    def __init__(self, base_url=OLLAMA_URL, model=OLLAMA_MODEL, keep_alive=OLLAMA_KEEP_ALIVE,
+                 retries=OLLAMA_RETRIES, backoff=OLLAMA_BACKOFF, timeout=OLLAMA_TIMEOUT, pool_size=OLLAMA_POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.keep_alive = keep_alive
+        self.retries = retries
+        self.backoff = backoff
+        self._client = None
+        if httpx is not None:
+            self._client = httpx.AsyncClient(
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            )
+
+    async def generate(self, prompt: str, on_token=None, model: str = None) -> str:
+        if self._client is None:
+            return await asyncio.to_thread(get_client().generate, prompt, on_token, model)
+
+        timing = _Timing(model or self.model)
+        try:
+            text = await self._generate(prompt, on_token, model, timing)
+        except OllamaError:
+            timing.finish("error")
+            raise
+        timing.finish("ok")
+        return text
+
+    async def _generate(self, prompt, on_token, model, timing):
+        parts = []
+        for attempt in range(self.retries + 1):
+            payload = {
+                "model": model or self.model,
+                "messages": _messages(prompt, "".join(parts)),
+                "stream": True,
+                "keep_alive": self.keep_alive,
+            }
+            try:
+                async with self._client.stream("POST", f"{self.base_url}/api/chat", json=payload) as resp:
+                    resp.raise_for_status()
+                    finished = False
+                    async for line in resp.aiter_lines():
+                        if not line or finished:
+                            continue
+                        token, finished = _parse_line(line)
+                        if token:
+                            parts.append(token)
+                            timing.token()
+                            if on_token:
+                                on_token(token)
+                if finished:
+                    return "".join(parts)
+                raise OllamaError("stream ended before completion")
+            except (httpx.HTTPError, ValueError, OllamaError) as e:
+                if attempt >= self.retries or not _retryable(e):
+                    raise OllamaError(f"Ollama request failed after {attempt + 1} attempt(s): {e}") from e
+                delay = self.backoff * 2 ** attempt
+                logging.warning(f"Ollama request failed ({e}); retrying in {delay:.1f}s with {len(parts)} tokens kept")
+                await asyncio.sleep(delay)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> OllamaClient:
+    """Returns the process-wide pooled client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OllamaClient()
+        return _client
+
+def get_async_client() -> AsyncOllamaClient:
+    """Returns the process-wide async client (bound to the running event loop on first use)."""
+    global _async_client
+    with _client_lock:
+        if _async_client is None:
+            _async_client = AsyncOllamaClient()
+        return _async_client
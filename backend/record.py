@@ -1,18 +1,23 @@
 import os
+import json
 import time
+import queue
 import threading
 import logging
 import wave
 from datetime import datetime
 from dotenv import load_dotenv
-import sounddevice as sd
 import numpy as np
-import mss
 import signal
 
+from storage import SCREENSHOT_INTERVAL, SCREENSHOT_MANIFEST
+
+# Capture libraries load on first use, so processing-only (headless) deployments never need them
+sd = None
+mss = None
+
 # Load environment variables
 load_dotenv()
-SCREENSHOT_INTERVAL = int(os.getenv("SCREENSHOT_INTERVAL", 5))
 AUDIO_DURATION = int(os.getenv("DEFAULT_AUDIO_DURATION", 10))  # seconds
 OUTPUT_ROOT = os.path.abspath(os.getenv("OUTPUT_DIR", "../sessions"))
 
@@ -26,6 +31,25 @@ logging.basicConfig(
 )
 
 AUDIO_FS = 44100  # Sample rate
+WHISPER_FS = 16000  # What Whisper consumes; recording at this rate mono cuts disk I/O ~5x
+
+# Incremental WAV writing: frames are staged in a fixed-size buffer and appended to disk
+RECORD_BUFFER_SECONDS = float(os.getenv("RECORD_BUFFER_SECONDS", 1))
+RECORD_DOWNSAMPLE = os.getenv("RECORD_DOWNSAMPLE", "false").lower() in ("1", "true", "yes")
+
+# Callback capture: PortAudio hands blocks to a queue drained by the audio thread
+CAPTURE_BLOCK_SECONDS = float(os.getenv("CAPTURE_BLOCK_SECONDS", 0.05))
+CAPTURE_QUEUE_SECONDS = float(os.getenv("CAPTURE_QUEUE_SECONDS", 30))  # backlog tolerated before dropping
+
+# Screenshot deduplication: only persist frames that differ enough from the last saved one
+SCREENSHOT_DEDUP = os.getenv("SCREENSHOT_DEDUP", "true").lower() in ("1", "true", "yes")
+SCREENSHOT_CHANGE_THRESHOLD = float(os.getenv("SCREENSHOT_CHANGE_THRESHOLD", 0.01))  # fraction of cells
+FINGERPRINT_SHAPE = (36, 64)  # rows, cols of the downscaled grayscale thumbnail
+FINGERPRINT_PIXEL_DELTA = 12  # grey levels a cell must move to count as changed
+
+# Streaming transcription: fixed-size chunks with a small overlap so words on a boundary survive
+STREAM_CHUNK_SECONDS = float(os.getenv("STREAM_CHUNK_SECONDS", 30))
+STREAM_CHUNK_OVERLAP = float(os.getenv("STREAM_CHUNK_OVERLAP", 2))
 
 # Global flag for graceful termination
 stop_flag = threading.Event()
@@ -34,11 +58,200 @@ def signal_handler(sig, frame):
     logging.info("🔴 Termination signal received. Stopping...")
     stop_flag.set()
 
-signal.signal(signal.SIGINT, signal_handler)
+def _sounddevice():
+    global sd
+    if sd is None:
+        import sounddevice
+        sd = sounddevice
+    return sd
+
+def _mss():
+    global mss
+    if mss is None:
+        import mss.tools  # binds the package, with its to_png helpers, to the global
+    return mss
+
+def capture_available():
+    """Returns None when audio and screen capture can run here, else the reason they cannot."""
+    try:
+        _sounddevice()
+        _mss()
+    except (ImportError, OSError) as e:  # sounddevice raises OSError when PortAudio is missing
+        return f"Capture dependencies unavailable: {e}"
+    return None
+
+class AudioChunker:
+    """Splits a live frame stream into overlapping fixed-size chunks for a consumer queue.
+
+    Each queued item is ``(offset_seconds, frames)``; ``None`` marks the end of the stream.
+    """
+
+    def __init__(self, out_queue, samplerate, chunk_seconds=STREAM_CHUNK_SECONDS, overlap_seconds=STREAM_CHUNK_OVERLAP):
+        self.queue = out_queue
+        self.samplerate = samplerate
+        self.chunk_frames = max(1, int(chunk_seconds * samplerate))
+        self.overlap_frames = min(int(overlap_seconds * samplerate), self.chunk_frames // 2)
+        self._parts = []
+        self._frames = 0
+        self._start = 0  # absolute index of the first buffered frame
+        self.closed = False
+
+    def push(self, buffer):
+        self._parts.append(buffer.copy())
+        self._frames += len(buffer)
+        while self._frames >= self.chunk_frames:
+            data = np.concatenate(self._parts)
+            self._emit(data[:self.chunk_frames])
+            step = self.chunk_frames - self.overlap_frames
+            self._start += step
+            self._parts = [data[step:]]
+            self._frames = len(self._parts[0])
+
+    def close(self):
+        # Only the overlap left means it was already covered by the previous chunk
+        if self._frames > self.overlap_frames or (self._frames and self._start == 0):
+            self._emit(np.concatenate(self._parts))
+        self._parts = []
+        self._frames = 0
+        self.closed = True
+        self.queue.put(None)
+
+    def _emit(self, data):
+        self.queue.put((self._start / self.samplerate, data))
+        logging.info(f"Queued audio chunk at {self._start / self.samplerate:.1f}s ({len(data)} frames)")
+
+def output_samplerate(samplerate=AUDIO_FS, downsample=RECORD_DOWNSAMPLE):
+    """Sample rate of the frames written to disk (and handed to the chunk queue)."""
+    return WHISPER_FS if downsample else samplerate
+
+class WavSink:
+    """Appends PCM frames to a WAV file through a fixed-size, reused buffer.
+
+    Every flush goes through ``writeframes`` which re-patches the RIFF header, so the file
+    on disk is always playable up to the last flush even if the process dies.
+    """
+
+    def __init__(self, path, channels, samplerate, buffer_seconds=RECORD_BUFFER_SECONDS):
+        self._wf = wave.open(path, 'wb')
+        self._wf.setnchannels(channels)
+        self._wf.setsampwidth(2)
+        self._wf.setframerate(samplerate)
+        self._buffer = np.zeros((max(1, int(buffer_seconds * samplerate)), channels), dtype='int16')
+        self._fill = 0
+        self.frames_written = 0
+        self.closed = False
+
+    def write(self, frames):
+        while len(frames):
+            n = min(len(frames), len(self._buffer) - self._fill)
+            self._buffer[self._fill:self._fill + n] = frames[:n]
+            self._fill += n
+            frames = frames[n:]
+            if self._fill == len(self._buffer):
+                self.flush()
+
+    def flush(self):
+        if self._fill:
+            self._wf.writeframes(self._buffer[:self._fill].tobytes())
+            self.frames_written += self._fill
+            self._fill = 0
 
-def record_audio(output_file, duration=AUDIO_DURATION, samplerate=AUDIO_FS):
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self._wf.close()
+        self.closed = True
+
+class Downsampler:
+    """Streaming resampler to mono int16, continuous across blocks.
+
+    Input is low-pass filtered (the same FIR as transcribe.to_whisper_audio) before linear
+    interpolation, so content above the new Nyquist frequency does not alias into the recording.
+    """
+
+    def __init__(self, src_rate, dst_rate=WHISPER_FS):
+        # import here: transcribe configures its own logging, which must not replace record.log
+        from transcribe import lowpass_kernel, RESAMPLE_CUTOFF
+
+        self.step = src_rate / dst_rate
+        self._prev = None  # last input sample of the previous block
+        self._next = 1.0   # position of the next output sample, in [prev, *block] coordinates
+        self._kernel = lowpass_kernel(RESAMPLE_CUTOFF * dst_rate / src_rate) if src_rate > dst_rate else None
+        taps = len(self._kernel) if self._kernel is not None else 1
+        self._history = np.zeros(taps - 1, dtype=np.float32)  # input tail carried into the next block's filter
+        self._skip = (taps - 1) // 2  # filter delay, dropped once so output stays aligned with the input
+
+    def _filter(self, mono):
+        data = np.concatenate((self._history, mono))
+        self._history = data[len(data) - len(self._history):]
+        filtered = np.convolve(data, self._kernel, mode="valid")
+        drop = min(self._skip, len(filtered))
+        self._skip -= drop
+        return filtered[drop:]
+
+    def process(self, frames):
+        mono = np.asarray(frames, dtype=np.float32)
+        if mono.ndim > 1:
+            mono = mono.mean(axis=1)
+        if self._kernel is not None and len(mono):
+            mono = self._filter(mono)
+        if not len(mono):
+            return np.zeros((0, 1), dtype='int16')
+        if self._prev is None:
+            self._prev = mono[0]
+        data = np.concatenate(([self._prev], mono))
+        last = len(data) - 1
+        positions = np.arange(self._next, last, self.step)
+        out = np.interp(positions, np.arange(len(data)), data)
+        self._next = (positions[-1] + self.step if len(positions) else self._next) - last
+        self._prev = data[-1]
+        return np.round(out).astype('int16').reshape(-1, 1)
+
+class CaptureStats:
+    """Counters for the audio capture engine, reported through /session-status."""
+
+    def __init__(self):
+        self.blocks = 0
+        self.frames = 0
+        self.overflows = 0
+        self.underflows = 0
+        self.dropped_blocks = 0
+        self.dropped_frames = 0
+        self.max_queue_depth = 0
+        self.last_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self._latency_total = 0.0
+
+    def record_latency(self, seconds):
+        latency_ms = seconds * 1000
+        self.last_latency_ms = latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        self._latency_total += latency_ms
+
+    def as_dict(self):
+        return {
+            "blocks": self.blocks,
+            "frames": self.frames,
+            "overflows": self.overflows,
+            "underflows": self.underflows,
+            "dropped_blocks": self.dropped_blocks,
+            "dropped_frames": self.dropped_frames,
+            "max_queue_depth": self.max_queue_depth,
+            "last_latency_ms": round(self.last_latency_ms, 2),
+            "avg_latency_ms": round(self._latency_total / self.blocks, 2) if self.blocks else 0.0,
+            "max_latency_ms": round(self.max_latency_ms, 2),
+        }
+
+def record_audio(output_file, duration=AUDIO_DURATION, samplerate=AUDIO_FS, chunk_queue=None, downsample=RECORD_DOWNSAMPLE,
+                 stats=None, stop_event=None, device=None):
+    chunker = None
+    sink = None
+    stats = stats if stats is not None else CaptureStats()
+    stop_event = stop_event if stop_event is not None else stop_flag
     try:
-        input_device = sd.default.device[0]
+        sd = _sounddevice()
+        input_device = device if device is not None else sd.default.device[0]
         device_info = sd.query_devices(input_device, 'input')
         channels = device_info.get('max_input_channels', 1)
         if channels < 1 or channels > 2:
@@ -47,36 +260,78 @@ def record_audio(output_file, duration=AUDIO_DURATION, samplerate=AUDIO_FS):
 
         logging.info(f"Recording audio with {channels} channel(s) from: {device_info.get('name', 'Unknown device')}")
         
+        out_rate = output_samplerate(samplerate, downsample)
+        resampler = Downsampler(samplerate, out_rate) if downsample else None
+        sink = WavSink(output_file, 1 if downsample else channels, out_rate)
+        chunker = AudioChunker(chunk_queue, out_rate) if chunk_queue is not None else None
+        if downsample:
+            logging.info(f"Downsampling to {out_rate} Hz mono while recording")
+
         total_frames = int(duration * samplerate)
-        audio = np.zeros((total_frames, channels), dtype='int16')
-        stream = sd.InputStream(samplerate=samplerate, channels=channels, dtype='int16')
+        blocksize = max(1, int(CAPTURE_BLOCK_SECONDS * samplerate))
+        blocks = queue.Queue(maxsize=max(1, int(CAPTURE_QUEUE_SECONDS / CAPTURE_BLOCK_SECONDS)))
+
+        def callback(indata, frames, time_info, status):
+            # Runs on the PortAudio thread: never block here, just hand the block off
+            if status.input_overflow:
+                stats.overflows += 1
+            if status.input_underflow:
+                stats.underflows += 1
+            try:
+                blocks.put_nowait((time.monotonic(), indata.copy()))
+            except queue.Full:
+                stats.dropped_blocks += 1
+                stats.dropped_frames += frames
+
+        stream = sd.InputStream(
+            device=input_device, samplerate=samplerate, channels=channels, dtype='int16',
+            blocksize=blocksize, callback=callback
+        )
+
+        recorded_frames = 0
+
+        def consume(captured_at, buffer):
+            nonlocal recorded_frames
+            stats.record_latency(time.monotonic() - captured_at)
+            frames = min(len(buffer), total_frames - recorded_frames)
+            block = buffer[:frames]
+            if resampler:
+                block = resampler.process(block)
+            sink.write(block)
+            if chunker:
+                chunker.push(block)
+            recorded_frames += frames
+            stats.blocks += 1
+            stats.frames += frames
 
         with stream:
-            recorded_frames = 0
             start_time = time.time()
-            while time.time() - start_time < duration:
-                if stop_flag.is_set():
+            while time.time() - start_time < duration and recorded_frames < total_frames:
+                if stop_event.is_set():
                     logging.info("Stop flag detected during audio recording.")
                     break
-                buffer, overflow = stream.read(samplerate // 5)
-                if overflow:
-                    logging.warning("Buffer overflow occurred during recording.")
-                frames = len(buffer)
-                end_frame = recorded_frames + frames
-                if end_frame > total_frames:
-                    end_frame = total_frames
-                    frames = total_frames - recorded_frames
-                audio[recorded_frames:end_frame] = buffer[:frames]
-                recorded_frames += frames
-            logging.info(f"Recorded {recorded_frames} frames out of {total_frames}")
-            
-        audio = audio[:recorded_frames]
-        with wave.open(output_file, 'w') as wf:
-            wf.setnchannels(channels)
-            wf.setsampwidth(2)
-            wf.setframerate(samplerate)
-            wf.writeframes(audio.tobytes())
-        logging.info(f"✅ Audio recording complete. Saved to: {output_file}")
+                try:
+                    item = blocks.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                stats.max_queue_depth = max(stats.max_queue_depth, blocks.qsize() + 1)
+                consume(*item)
+        # The stream is closed; keep the blocks that were already captured
+        while recorded_frames < total_frames:
+            try:
+                consume(*blocks.get_nowait())
+            except queue.Empty:
+                break
+        logging.info(f"Recorded {recorded_frames} frames out of {total_frames}")
+        if stats.overflows or stats.dropped_frames:
+            logging.warning(
+                f"Capture lost data: {stats.overflows} overflow(s), {stats.dropped_frames} dropped frame(s)"
+            )
+        if chunker:
+            chunker.close()  # hand the last chunk to the transcriber before finalizing the WAV
+
+        sink.close()
+        logging.info(f"✅ Audio recording complete. Saved to: {output_file} ({sink.frames_written} frames)")
         print(f"Audio saved to: {output_file}")
         if not os.path.exists(output_file):
             logging.error(f"Audio file was not created: {output_file}")
@@ -84,29 +339,96 @@ def record_audio(output_file, duration=AUDIO_DURATION, samplerate=AUDIO_FS):
             logging.info(f"Audio file exists: {os.path.abspath(output_file)}")
     except Exception as e:
         logging.error(f"❌ Audio recording error: {e}", exc_info=True)
+    finally:
+        # Keep whatever was captured, and always deliver the end marker so the transcriber can finish
+        if sink and not sink.closed:
+            sink.close()
+        if chunker and not chunker.closed:
+            chunker.close()
+        elif chunker is None and chunk_queue is not None:
+            chunk_queue.put(None)
+
+def frame_fingerprint(bgra, shape=FINGERPRINT_SHAPE):
+    """Downscales a BGRA frame to a small grayscale thumbnail for cheap change detection."""
+    frame = np.asarray(bgra)[::4, ::4, :3].astype(np.float32)
+    gray = frame[..., 0] * 0.114 + frame[..., 1] * 0.587 + frame[..., 2] * 0.299
+    rows, cols = shape
+    h, w = gray.shape
+    by, bx = max(1, h // rows), max(1, w // cols)
+    rows, cols = min(rows, h // by), min(cols, w // bx)
+    gray = gray[:rows * by, :cols * bx]
+    return gray.reshape(rows, by, cols, bx).mean(axis=(1, 3))
+
+def frame_change(previous, current):
+    """Fraction of thumbnail cells that changed noticeably (1.0 when there is nothing to compare)."""
+    if previous is None or previous.shape != current.shape:
+        return 1.0
+    return float(np.mean(np.abs(current - previous) > FINGERPRINT_PIXEL_DELTA))
 
-def capture_screen(session_dir):
+def capture_screen(session_dir, dedup=SCREENSHOT_DEDUP, threshold=SCREENSHOT_CHANGE_THRESHOLD, stop_event=None, monitor_index=1):
+    stop_event = stop_event if stop_event is not None else stop_flag
     try:
         logging.info("Starting screenshot capture...")
-        with mss.mss() as sct:
+        manifest_path = os.path.join(session_dir, SCREENSHOT_MANIFEST)
+        with _mss().mss() as sct:
+            monitor = sct.monitors[monitor_index]
             count = 0
+            grabbed = 0
+            last_fingerprint = None
             start_time = time.time()
             while time.time() - start_time < AUDIO_DURATION:
-                if stop_flag.is_set():
+                if stop_event.is_set():
                     logging.info("Stop flag detected during screen capture.")
                     break
                 filename = os.path.join(session_dir, f"screenshot_{count:03}.png")
-                # Capture and save the screenshot
-                sct.shot(output=filename)
-                logging.info(f"📸 Saved screenshot: {filename}")
-                print(f"Screenshot saved: {filename}")
-                time.sleep(SCREENSHOT_INTERVAL)
-                count += 1
+                if not dedup:
+                    # Capture and save the screenshot
+                    captured_at = time.time()
+                    sct.shot(mon=monitor_index, output=filename)
+                    entry = {
+                        "file": os.path.basename(filename),
+                        "offset": round(captured_at - start_time, 2),
+                        "captured_at": datetime.fromtimestamp(captured_at).isoformat(),
+                    }
+                    with open(manifest_path, "a", encoding="utf-8") as mf:
+                        mf.write(json.dumps(entry) + "\n")
+                    logging.info(f"📸 Saved screenshot: {filename}")
+                    print(f"Screenshot saved: {filename}")
+                    count += 1
+                else:
+                    captured_at = time.time()
+                    shot = sct.grab(monitor)
+                    grabbed += 1
+                    frame = np.frombuffer(shot.bgra, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+                    fingerprint = frame_fingerprint(frame)
+                    change = frame_change(last_fingerprint, fingerprint)
+                    if change >= threshold:
+                        _mss().tools.to_png(shot.rgb, shot.size, output=filename)
+                        last_fingerprint = fingerprint
+                        entry = {
+                            "file": os.path.basename(filename),
+                            "offset": round(captured_at - start_time, 2),
+                            "captured_at": datetime.fromtimestamp(captured_at).isoformat(),
+                            "change": round(change, 4),
+                        }
+                        with open(manifest_path, "a", encoding="utf-8") as mf:
+                            mf.write(json.dumps(entry) + "\n")
+                        logging.info(f"📸 Saved screenshot: {filename} (change {change:.3f})")
+                        print(f"Screenshot saved: {filename}")
+                        count += 1
+                    else:
+                        logging.debug(f"Skipped unchanged frame (change {change:.3f})")
+                if stop_event.wait(SCREENSHOT_INTERVAL):
+                    logging.info("Stop flag detected during screen capture.")
+                    break
+        if dedup:
+            logging.info(f"Kept {count} of {grabbed} frames")
         logging.info("✅ Screen capture complete.")
     except Exception as e:
         logging.error(f"❌ Screen capture error: {e}", exc_info=True)
 
 def main():
+    signal.signal(signal.SIGINT, signal_handler)  # Ctrl+C ends the CLI session gracefully
     logging.info("🚀 Session started")
     print("Session started")
     
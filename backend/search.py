@@ -0,0 +1,342 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+import numpy as np
+
+from timeline import load_timeline
+from storage import SEGMENTS_FILE, SCREENSHOT_MANIFEST, OCR_COMBINED_FILE
+
+# Full-text index (SQLite FTS5, BM25 ranking) of transcript windows, slide OCR text and summaries
+# across all sessions, with optional embeddings for semantic search kept in memory as one matrix.
+SEARCH_DB_PATH = os.getenv("SEARCH_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "search.db"))
+SEARCH_CHUNK_SECONDS = float(os.getenv("SEARCH_CHUNK_SECONDS", 30))  # transcript is indexed in windows this long
+# Semantic search embeds every chunk with a local Ollama embedding model; off by default (keyword only)
+SEARCH_EMBEDDINGS = os.getenv("SEARCH_EMBEDDINGS", "false").lower() in ("1", "true", "yes")
+SEARCH_EMBED_MODEL = os.getenv("SEARCH_EMBED_MODEL", "nomic-embed-text")
+SEARCH_EMBED_BATCH = int(os.getenv("SEARCH_EMBED_BATCH", 32))  # chunks per embedding request
+# BM25 scores at most this many matches per query (the most recently indexed ones), which bounds
+# the latency of queries made only of very common words; selective queries never reach it
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", 5000))
+
+# A session is re-indexed when any of these files changes
+SOURCE_FILES = (SEGMENTS_FILE, "transcript.txt", SCREENSHOT_MANIFEST, OCR_COMBINED_FILE, "summary.json")
+KINDS = ("transcript", "slide", "summary")
+MODES = ("keyword", "semantic", "hybrid")
+RRF_K = 60  # reciprocal rank fusion constant for hybrid ranking
+# Dropped from keyword queries (unless nothing else is left): they match nearly every chunk, and
+# BM25 has to score every match before the top hits are known
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i in is it its of on or so "
+    "that the their they this to was we were what when which who will with you your".split()
+)
+
+def ollama_embedder(texts):
+    from ollama_client import get_client  # only needed with SEARCH_EMBEDDINGS
+
+    vectors = []
+    for i in range(0, len(texts), SEARCH_EMBED_BATCH):
+        vectors.extend(get_client().embed(texts[i:i + SEARCH_EMBED_BATCH], SEARCH_EMBED_MODEL))
+    return vectors
+
+def default_embedder():
+    return ollama_embedder if SEARCH_EMBEDDINGS else None
+
+def _summary_text(value) -> str:
+    if isinstance(value, str):
+        return "" if value.startswith(("http://", "https://")) else value
+    if isinstance(value, dict):
+        return "\n".join(filter(None, (_summary_text(v) for v in value.values())))
+    if isinstance(value, list):
+        return "\n".join(filter(None, (_summary_text(v) for v in value)))
+    return ""
+
+def session_chunks(session_dir: str, chunk_seconds: float = SEARCH_CHUNK_SECONDS) -> list:
+    """Searchable pieces of one session: [{kind, start, end, text}] (times are None for the summary)."""
+    timeline = load_timeline(session_dir)
+    chunks = []
+    current = None
+    for seg in timeline.segments():
+        if current is None or seg["start"] - current["start"] >= chunk_seconds:
+            current = {"kind": "transcript", "start": seg["start"], "end": seg["end"], "texts": []}
+            chunks.append(current)
+        current["end"] = max(current["end"], seg["end"])
+        current["texts"].append(seg["text"])
+    for chunk in chunks:
+        chunk["text"] = " ".join(chunk.pop("texts"))
+
+    slides = timeline.slides()
+    for i, slide in enumerate(slides):
+        if slide["text"]:
+            end = slides[i + 1]["time"] if i + 1 < len(slides) else None
+            chunks.append({"kind": "slide", "start": slide["time"], "end": end, "text": slide["text"]})
+
+    try:
+        with open(os.path.join(session_dir, "summary.json"), "r", encoding="utf-8") as f:
+            summary = _summary_text(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        summary = ""
+    if summary:
+        chunks.append({"kind": "summary", "start": None, "end": None, "text": summary})
+    return [chunk for chunk in chunks if chunk["text"].strip()]
+
+def _match_expression(query: str, any_term: bool = False):
+    # Quote every word so user input cannot inject FTS5 syntax (NEAR, column filters, ...)
+    terms = re.findall(r"\w+", query.lower())
+    terms = [term for term in terms if term not in STOPWORDS] or terms
+    return (" OR " if any_term else " ").join(f'"{term}"' for term in terms) or None
+
+class SearchIndex:
+    """On-disk search index over all sessions, updated one session at a time.
+
+    `embed(texts)` returns one vector per text from the embedding `model`; without it only
+    keyword search is available.
+    """
+
+    def __init__(self, path=SEARCH_DB_PATH, embed=None, model=SEARCH_EMBED_MODEL):
+        self.embed = embed
+        self.model = model if embed else ""
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+                text, session_id UNINDEXED, kind UNINDEXED, start_time UNINDEXED, end_time UNINDEXED,
+                tokenize = 'porter unicode61 remove_diacritics 2'
+            );
+            CREATE TABLE IF NOT EXISTS indexed (
+                session_id TEXT PRIMARY KEY,
+                signature TEXT NOT NULL,
+                chunks INTEGER NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS vectors (
+                chunk_id INTEGER PRIMARY KEY,
+                session_id TEXT NOT NULL,
+                model TEXT NOT NULL,
+                vector BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS vectors_session ON vectors (session_id);
+            """
+        )
+        self._db.commit()
+        self._matrix = None  # (chunk ids, session ids, unit vectors), loaded on the first semantic query
+
+    def _signature(self, session_dir):
+        mtimes = {}
+        for name in SOURCE_FILES:
+            path = os.path.join(session_dir, name)
+            if os.path.exists(path):
+                mtimes[name] = os.path.getmtime(path)
+        return json.dumps({"files": mtimes, "model": self.model}, sort_keys=True)
+
+    def index_session(self, session_dir: str, force: bool = False):
+        """(Re)indexes one session when its sources changed; returns the chunk count, or None if up to date."""
+        session_id = os.path.basename(session_dir)
+        signature = self._signature(session_dir)
+        with self._lock:
+            row = self._db.execute("SELECT signature FROM indexed WHERE session_id = ?", (session_id,)).fetchone()
+        if row and row[0] == signature and not force:
+            return None
+
+        chunks = session_chunks(session_dir)
+        vectors = None
+        if self.embed and chunks:
+            try:
+                vectors = self._normalize(self.embed([chunk["text"] for chunk in chunks]))
+            except Exception as e:
+                # Keyword search still works; the model-less signature makes the next pass retry
+                logging.warning(f"Embedding {session_id} failed, indexed for keyword search only: {e}")
+                signature = json.dumps({**json.loads(signature), "model": ""}, sort_keys=True)
+
+        with self._lock:
+            self._delete(session_id)
+            ids = []
+            for chunk in chunks:
+                cur = self._db.execute(
+                    "INSERT INTO chunks (text, session_id, kind, start_time, end_time) VALUES (?, ?, ?, ?, ?)",
+                    (chunk["text"], session_id, chunk["kind"], chunk["start"], chunk["end"]),
+                )
+                ids.append(cur.lastrowid)
+            if vectors is not None:
+                self._db.executemany(
+                    "INSERT INTO vectors (chunk_id, session_id, model, vector) VALUES (?, ?, ?, ?)",
+                    [(chunk_id, session_id, self.model, vec.tobytes()) for chunk_id, vec in zip(ids, vectors)],
+                )
+            self._db.execute(
+                "INSERT OR REPLACE INTO indexed (session_id, signature, chunks, updated) VALUES (?, ?, ?, ?)",
+                (session_id, signature, len(chunks), time.time()),
+            )
+            self._db.commit()
+            if self._matrix is not None:
+                self._replace_rows(session_id, ids if vectors is not None else [], vectors)
+        logging.info(f"Indexed {session_id} for search: {len(chunks)} chunks")
+        return len(chunks)
+
+    def index_all(self, sessions_dir: str) -> dict:
+        """Brings the index up to date with every session directory; drops sessions that were deleted."""
+        names = sorted(entry.name for entry in os.scandir(sessions_dir) if entry.is_dir())
+        updated = 0
+        for name in names:
+            try:
+                if self.index_session(os.path.join(sessions_dir, name)) is not None:
+                    updated += 1
+            except Exception as e:
+                logging.error(f"Search indexing of {name} failed: {e}")
+        with self._lock:
+            known = {row[0] for row in self._db.execute("SELECT session_id FROM indexed")}
+        removed = known - set(names)
+        for session_id in removed:
+            self.remove(session_id)
+        if updated or removed:
+            logging.info(f"Search index: {updated} session(s) updated, {len(removed)} removed")
+        return {"sessions": len(names), "updated": updated, "removed": len(removed)}
+
+    def remove(self, session_id: str):
+        with self._lock:
+            self._delete(session_id)
+            self._db.execute("DELETE FROM indexed WHERE session_id = ?", (session_id,))
+            self._db.commit()
+            if self._matrix is not None:
+                self._replace_rows(session_id, [], None)
+
+    def _delete(self, session_id):
+        self._db.execute("DELETE FROM chunks WHERE session_id = ?", (session_id,))
+        self._db.execute("DELETE FROM vectors WHERE session_id = ?", (session_id,))
+
+    @staticmethod
+    def _normalize(vectors):
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1.0)
+
+    def _load_matrix(self):
+        rows = self._db.execute("SELECT chunk_id, session_id, vector FROM vectors WHERE model = ?", (self.model,)).fetchall()
+        ids = np.array([r[0] for r in rows], dtype=np.int64)
+        sessions = np.array([r[1] for r in rows], dtype=object)
+        vectors = np.stack([np.frombuffer(r[2], dtype=np.float32) for r in rows]) if rows else None
+        self._matrix = (ids, sessions, vectors)
+
+    def _replace_rows(self, session_id, ids, vectors):
+        # Keeps the in-memory matrix in step with the table without reloading every vector
+        all_ids, sessions, matrix = self._matrix
+        keep = sessions != session_id
+        all_ids, sessions = all_ids[keep], sessions[keep]
+        matrix = matrix[keep] if matrix is not None else None
+        if len(ids):
+            all_ids = np.concatenate([all_ids, np.array(ids, dtype=np.int64)])
+            sessions = np.concatenate([sessions, np.array([session_id] * len(ids), dtype=object)])
+            matrix = vectors if matrix is None or not len(matrix) else np.vstack([matrix, vectors])
+        self._matrix = (all_ids, sessions, matrix)
+
+    def stats(self) -> dict:
+        with self._lock:
+            sessions, chunks = self._db.execute("SELECT COUNT(*), COALESCE(SUM(chunks), 0) FROM indexed").fetchone()
+            vectors = self._db.execute("SELECT COUNT(*) FROM vectors WHERE model = ?", (self.model,)).fetchone()[0]
+        return {"sessions": sessions, "chunks": chunks, "vectors": vectors, "embedding_model": self.model or None}
+
+    def _keyword(self, query, limit, kind):
+        where = " AND kind = ?" if kind else ""
+        top = []
+        with self._lock:
+            # All terms first; fall back to any term when no chunk contains every word
+            for any_term in (False, True):
+                expression = _match_expression(query, any_term)
+                if not expression:
+                    return []
+                top = self._db.execute(
+                    "SELECT id, score FROM (SELECT rowid AS id, bm25(chunks) AS score FROM chunks"
+                    f" WHERE chunks MATCH ?{where} ORDER BY rowid DESC LIMIT ?) ORDER BY score LIMIT ?",
+                    (expression, *([kind] if kind else []), SEARCH_MAX_CANDIDATES, limit),
+                ).fetchall()
+                if top:
+                    break
+            if not top:
+                return []
+            # Snippets only for the hits returned, not for every scored match
+            scores = dict(top)
+            rows = self._db.execute(
+                "SELECT rowid, session_id, kind, start_time, end_time, snippet(chunks, 0, '[', ']', '…', 16)"
+                f" FROM chunks WHERE chunks MATCH ? AND rowid IN ({','.join('?' * len(scores))})",
+                (expression, *scores),
+            ).fetchall()
+        hits = [self._hit(row[:5], row[5], -scores[row[0]]) for row in rows]
+        return sorted(hits, key=lambda hit: -hit["score"])
+
+    def _semantic(self, query, limit, kind):
+        query_vector = self._normalize(self.embed([query]))[0]
+        with self._lock:
+            if self._matrix is None:
+                self._load_matrix()
+            ids, _, matrix = self._matrix
+        if matrix is None or not len(matrix):
+            return []
+        scores = matrix @ query_vector
+        # Kind filters are applied after ranking, so over-fetch a little
+        k = min(len(scores), limit * 4 if kind else limit)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        order = {int(ids[i]): float(scores[i]) for i in top if scores[i] > 0}  # unrelated chunks score <= 0
+        if not order:
+            return []
+        placeholders = ",".join("?" * len(order))
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT rowid, session_id, kind, start_time, end_time, text FROM chunks"
+                f" WHERE rowid IN ({placeholders})",
+                list(order),
+            ).fetchall()
+        hits = [self._hit(row[:5], row[5][:200], order[row[0]]) for row in rows if not kind or row[2] == kind]
+        return sorted(hits, key=lambda hit: -hit["score"])[:limit]
+
+    @staticmethod
+    def _hit(row, snippet, score):
+        chunk_id, session_id, kind, start, end = row
+        return {
+            "chunk_id": chunk_id, "session_id": session_id, "kind": kind,
+            "start": start, "end": end, "snippet": snippet, "score": round(score, 6),
+        }
+
+    def search(self, query: str, limit: int = 20, mode: str = None, kind: str = None) -> list:
+        """Best-matching chunks for `query`, best first.
+
+        mode: "keyword" (BM25), "semantic" (cosine similarity of embeddings) or "hybrid"
+        (reciprocal rank fusion of both); defaults to hybrid when embeddings are enabled.
+        """
+        mode = mode or ("hybrid" if self.embed else "keyword")
+        if mode not in MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        if kind is not None and kind not in KINDS:
+            raise ValueError(f"Unknown kind: {kind}")
+        if mode != "keyword" and not self.embed:
+            raise ValueError("Semantic search is disabled (set SEARCH_EMBEDDINGS=true)")
+        if mode == "keyword":
+            return self._keyword(query, limit, kind)
+        if mode == "semantic":
+            return self._semantic(query, limit, kind)
+
+        fused = {}
+        for hits in (self._keyword(query, limit * 2, kind), self._semantic(query, limit * 2, kind)):
+            for rank, hit in enumerate(hits):
+                entry = fused.setdefault(hit["chunk_id"], {**hit, "score": 0.0})
+                entry["score"] += 1.0 / (RRF_K + rank + 1)  # keeps the highlighted keyword snippet
+        hits = sorted(fused.values(), key=lambda hit: -hit["score"])[:limit]
+        for hit in hits:
+            hit["score"] = round(hit["score"], 6)
+        return hits
+
+def group_by_session(hits) -> list:
+    """Sessions in order of their best hit, each with the time offsets of its matches."""
+    sessions = {}
+    for hit in hits:
+        entry = sessions.setdefault(hit["session_id"], {"session_id": hit["session_id"], "score": hit["score"], "offsets": []})
+        if hit["start"] is not None:
+            entry["offsets"].append(hit["start"])
+    for entry in sessions.values():
+        entry["offsets"].sort()
+    return list(sessions.values())
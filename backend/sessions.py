@@ -0,0 +1,197 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+
+from record import record_audio, capture_screen, output_samplerate, CaptureStats
+
+class RecordingSession:
+    """State of one capture session: its directory, worker threads and stop event."""
+
+    def __init__(self, session_dir, audio_device=None, monitor=1, catalog=None, on_finished=None):
+        self.id = os.path.basename(session_dir)
+        self.catalog = catalog
+        self.on_finished = on_finished
+        self.dir = session_dir
+        self.audio_file = os.path.join(session_dir, "audio.wav")
+        self.audio_device = audio_device
+        self.monitor = monitor
+        self.stop_event = threading.Event()
+        self.audio_stats = CaptureStats()
+        self.transcriber = None
+        self.audio_thread = None
+        self.screen_thread = None
+        self.started_at = time.time()
+
+    def start(self, stream_transcription=True):
+        chunk_queue = None
+        if stream_transcription:
+            from transcribe import StreamingTranscriber  # import here so that transcribe is only needed when used
+            self.transcriber = StreamingTranscriber(self.dir, output_samplerate()).start()
+            chunk_queue = self.transcriber.queue
+
+        self.audio_thread = threading.Thread(
+            target=record_audio,
+            args=(self.audio_file,),
+            kwargs={
+                "chunk_queue": chunk_queue,
+                "stats": self.audio_stats,
+                "stop_event": self.stop_event,
+                "device": self.audio_device,
+            },
+            name=f"AudioThread-{self.id}",
+        )
+        self.screen_thread = threading.Thread(
+            target=capture_screen,
+            args=(self.dir,),
+            kwargs={"stop_event": self.stop_event, "monitor_index": self.monitor},
+            name=f"ScreenThread-{self.id}",
+        )
+        self.audio_thread.start()
+        self.screen_thread.start()
+        threading.Thread(target=self._finalize, name=f"SessionFinalizer-{self.id}", daemon=True).start()
+        return self
+
+    def _finalize(self):
+        # Index the recorded artifacts once capture (and the streamed transcript) is complete
+        for t in (self.audio_thread, self.screen_thread, self.transcriber):
+            if t is not None:
+                t.join()
+        transcript = os.path.join(self.dir, "transcript.txt")
+        if self.transcriber and self.transcriber.failed_chunks and os.path.exists(transcript):
+            # Incomplete: date it before the recording, so /transcribe and batch runs decode the audio again
+            logging.warning(
+                f"Streamed transcript of {self.id} is missing {self.transcriber.failed_chunks} chunk(s); "
+                "it will be redone from the recording"
+            )
+            if os.path.exists(self.audio_file):
+                stale = os.path.getmtime(self.audio_file) - 1
+                os.utime(transcript, (stale, stale))
+        elif self.transcriber and os.path.exists(transcript):
+            # The streamed transcript is final: make it newer than the recording, so /transcribe
+            # and batch runs reuse it instead of decoding the audio again
+            os.utime(transcript)
+        if self.catalog:
+            try:
+                self.catalog.sync(self.id)
+                self.catalog.set_state(self.id, recording=False)
+            except Exception as e:
+                logging.error(f"Failed to catalogue session {self.id}: {e}")
+        if self.on_finished:
+            self.on_finished(self)
+
+    def stop(self):
+        self.stop_event.set()
+
+    @property
+    def recording(self):
+        return any(t is not None and t.is_alive() for t in (self.audio_thread, self.screen_thread))
+
+    def status(self):
+        return {
+            "session_folder": self.id,
+            "audio_alive": self.audio_thread.is_alive() if self.audio_thread else False,
+            "screen_alive": self.screen_thread.is_alive() if self.screen_thread else False,
+            "transcriber_alive": self.transcriber.is_alive() if self.transcriber else False,
+            "transcript_segments": len(self.transcriber.segments) if self.transcriber else 0,
+            "transcript_failed_chunks": self.transcriber.failed_chunks if self.transcriber else 0,
+            "audio_capture": self.audio_stats.as_dict(),
+        }
+
+class SessionManager:
+    """Registry of the sessions started by this process, keyed by session id (folder name)."""
+
+    def __init__(self, sessions_dir, catalog=None, on_finished=None):
+        """`on_finished(session)` runs once a session's capture and transcription have ended."""
+        self.sessions_dir = sessions_dir
+        self.catalog = catalog
+        self.on_finished = on_finished
+        self._sessions = {}  # sessions still recording or being finalized; finished ones are dropped
+        self._latest = None
+        self._media_locks = {}  # session id -> Lock, see media_lock()
+        self._lock = threading.Lock()
+
+    def create_dir(self):
+        """Creates a fresh session_<timestamp> directory, suffixed if one already exists."""
+        base = datetime.now().strftime("session_%Y%m%d_%H%M%S")
+        for n in range(1, 1000):
+            name = base if n == 1 else f"{base}_{n}"
+            path = os.path.join(self.sessions_dir, name)
+            try:
+                os.makedirs(path)
+                logging.info(f"Session directory created at: {path}")
+                return path
+            except FileExistsError:
+                continue
+        raise RuntimeError("Could not allocate a session directory")
+
+    def start(self, stream_transcription=True, audio_device=None, monitor=1):
+        session = RecordingSession(
+            self.create_dir(), audio_device=audio_device, monitor=monitor, catalog=self.catalog,
+            on_finished=self._finished,
+        )
+        if self.catalog:
+            self.catalog.register(session.id, session.started_at, recording=True)
+        with self._lock:
+            self._sessions[session.id] = session
+            self._latest = session.id
+        return session.start(stream_transcription)
+
+    def _finished(self, session):
+        try:
+            if self.on_finished:
+                self.on_finished(session)
+        except Exception as e:
+            logging.error(f"Post-processing of session {session.id} failed: {e}")
+        finally:
+            # Its files, catalogue entry and jobs outlive it; only the latest id is kept for resolve()
+            with self._lock:
+                self._sessions.pop(session.id, None)
+
+    def get(self, session_id=None):
+        """Returns the in-process session with this id (default: the latest started), or None once it finished."""
+        with self._lock:
+            return self._sessions.get(session_id or self._latest)
+
+    def active(self):
+        with self._lock:
+            return [s for s in self._sessions.values() if s.recording]
+
+    def session_path(self, session_id):
+        # Session ids are plain folder names; refuse anything that could escape SESSIONS_DIR
+        if not session_id or os.path.basename(session_id) != session_id or session_id in (".", ".."):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        return os.path.join(self.sessions_dir, session_id)
+
+    def resolve(self, session_id=None):
+        """Returns the directory for `session_id`, falling back to the latest session."""
+        if session_id:
+            path = self.session_path(session_id)
+            if not os.path.isdir(path):
+                raise FileNotFoundError(session_id)
+            return path
+        with self._lock:
+            latest = self._latest
+        if latest and os.path.isdir(os.path.join(self.sessions_dir, latest)):
+            return os.path.join(self.sessions_dir, latest)
+        if self.catalog:
+            latest_id = self.catalog.latest()
+            if latest_id and os.path.isdir(os.path.join(self.sessions_dir, latest_id)):
+                return os.path.join(self.sessions_dir, latest_id)
+        sessions = sorted(
+            name for name in os.listdir(self.sessions_dir) if os.path.isdir(os.path.join(self.sessions_dir, name))
+        )
+        if not sessions:
+            raise FileNotFoundError("No sessions found")
+        return os.path.join(self.sessions_dir, sessions[-1])
+
+    def media_lock(self, session):
+        """Lock held by jobs that read or rewrite a session's audio and screenshots (transcription, OCR,
+        compaction, retention); `session` is its id or directory."""
+        with self._lock:
+            return self._media_locks.setdefault(os.path.basename(session), threading.Lock())
+
+    def transcriber_for(self, session_dir):
+        session = self.get(os.path.basename(session_dir))
+        return session.transcriber if session else None
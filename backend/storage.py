@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import wave
+import shutil
+import logging
+import threading
+import importlib.util
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Session file layout shared by the recorder, transcription, the timeline and search
+SEGMENTS_FILE = "transcript_segments.jsonl"  # timestamped transcript, one JSON segment per line
+SCREENSHOT_MANIFEST = "screenshots.jsonl"  # one {file, offset} entry per saved screenshot
+OCR_COMBINED_FILE = "ocr.txt"  # all OCR text of a session, in screenshot order
+SCREENSHOT_INTERVAL = int(os.getenv("SCREENSHOT_INTERVAL", 5))  # seconds between screen grabs
+
+# Finished sessions are compacted in the background: audio.wav is transcoded to FLAC (or Opus) and
+# screenshot PNGs to WebP. Transcription, OCR and the timeline read the compressed files directly.
+# Audio needs the optional `soundfile` package; without it recordings stay WAV.
+STORAGE_COMPACT = os.getenv("STORAGE_COMPACT", "true").lower() in ("1", "true", "yes")
+STORAGE_AUDIO_FORMAT = os.getenv("STORAGE_AUDIO_FORMAT", "flac").lower()  # "flac" (lossless) or "opus"
+# Lossless WebP keeps the OCR input pixel-identical; lossy (STORAGE_IMAGE_QUALITY) is much smaller
+STORAGE_IMAGE_LOSSLESS = os.getenv("STORAGE_IMAGE_LOSSLESS", "true").lower() in ("1", "true", "yes")
+STORAGE_IMAGE_QUALITY = int(os.getenv("STORAGE_IMAGE_QUALITY", 80))
+
+# Retention: the oldest sessions are evicted once older than RETENTION_MAX_AGE_DAYS or while all
+# sessions together exceed RETENTION_MAX_TOTAL_MB (0 disables a limit). RETENTION_EVICT=media drops
+# audio and screenshots but keeps transcripts, OCR text and summaries; "session" deletes the folder.
+RETENTION_MAX_AGE_DAYS = float(os.getenv("RETENTION_MAX_AGE_DAYS", 0))
+RETENTION_MAX_TOTAL_MB = float(os.getenv("RETENTION_MAX_TOTAL_MB", 0))
+RETENTION_EVICT = os.getenv("RETENTION_EVICT", "media").lower()
+STORAGE_SWEEP_HOURS = float(os.getenv("STORAGE_SWEEP_HOURS", 6))  # compaction + retention interval
+
+AUDIO_FILES = ("audio.wav", "audio.flac", "audio.opus")  # preference order when several exist
+MEDIA_TYPES = {
+    ".wav": "audio/wav", ".flac": "audio/flac", ".opus": "audio/ogg",
+    ".png": "image/png", ".webp": "image/webp",
+}
+OPUS_SAMPLERATES = (8000, 12000, 16000, 24000, 48000)
+AUDIO_BLOCK_SECONDS = 30  # transcoding streams the recording in blocks of this length
+
+def session_audio(session_dir: str):
+    """Path of the session's recording (WAV or compressed), or None."""
+    for name in AUDIO_FILES:
+        path = os.path.join(session_dir, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+def is_screenshot(name: str) -> bool:
+    return name.startswith("screenshot_") and name.endswith((".png", ".webp"))
+
+def media_type(path: str) -> str:
+    return MEDIA_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+
+def read_pcm(path: str):
+    """Reads a FLAC/Opus/WAV file as (int16 frames [n, channels], samplerate); needs soundfile."""
+    import soundfile  # optional: only needed for compressed recordings
+
+    frames, samplerate = soundfile.read(path, dtype="int16", always_2d=True)
+    return frames, samplerate
+
+def audio_duration(path: str):
+    """Length of a recording in seconds, or None when it cannot be read."""
+    if not path:
+        return None
+    try:
+        if path.endswith(".wav"):
+            with wave.open(path, "rb") as wf:
+                return wf.getnframes() / wf.getframerate()
+        import soundfile
+        return soundfile.info(path).duration
+    except (ImportError, OSError, RuntimeError, wave.Error, EOFError):
+        return None
+
+def _replace(src: str, tmp: str, dst: str):
+    # The compressed file keeps the original's mtime, so "transcript newer than audio" checks still hold
+    st = os.stat(src)
+    os.utime(tmp, (st.st_atime, st.st_mtime))
+    os.replace(tmp, dst)
+    os.remove(src)
+
+def compact_audio(session_dir: str, fmt: str = STORAGE_AUDIO_FORMAT) -> int:
+    """Transcodes audio.wav to FLAC or Opus; returns the bytes saved (0 when nothing was done)."""
+    src = os.path.join(session_dir, "audio.wav")
+    if not os.path.exists(src):
+        return 0
+    import soundfile
+
+    with soundfile.SoundFile(src) as wav:
+        samplerate, channels, frames = wav.samplerate, wav.channels, wav.frames
+        if fmt == "opus" and samplerate not in OPUS_SAMPLERATES:
+            logging.warning(f"Opus does not support {samplerate} Hz; storing {src} as FLAC")
+            fmt = "flac"
+        if fmt == "opus":
+            dst, options = os.path.join(session_dir, "audio.opus"), {"format": "OGG", "subtype": "OPUS"}
+        else:
+            dst, options = os.path.join(session_dir, "audio.flac"), {"format": "FLAC", "subtype": "PCM_16"}
+        tmp = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with soundfile.SoundFile(tmp, "w", samplerate, channels, **options) as out:
+                for block in wav.blocks(blocksize=samplerate * AUDIO_BLOCK_SECONDS, dtype="int16", always_2d=True):
+                    out.write(block)
+            if soundfile.info(tmp).frames < frames - samplerate // 10:
+                raise RuntimeError(f"Transcoded audio is shorter than {src}")
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+    saved = os.path.getsize(src) - os.path.getsize(tmp)
+    _replace(src, tmp, dst)
+    logging.info(f"Compressed {src} to {os.path.basename(dst)} ({saved / 1e6:.1f} MB saved)")
+    return saved
+
+def compact_screenshots(session_dir: str, lossless: bool = STORAGE_IMAGE_LOSSLESS, quality: int = STORAGE_IMAGE_QUALITY):
+    """Re-encodes screenshot PNGs as WebP (keeping a PNG when WebP is not smaller).
+
+    OCR outputs and the screenshot manifest are renamed along with the images.
+    Returns (images converted, bytes saved).
+    """
+    from PIL import Image
+
+    renamed = {}
+    saved = 0
+    for name in sorted(os.listdir(session_dir)):
+        if not (is_screenshot(name) and name.endswith(".png")):
+            continue
+        src = os.path.join(session_dir, name)
+        webp_name = name[:-len(".png")] + ".webp"
+        dst = os.path.join(session_dir, webp_name)
+        tmp = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with Image.open(src) as img:
+                img.save(tmp, format="WEBP", lossless=lossless, quality=100 if lossless else quality, method=4)
+        except OSError as e:
+            logging.warning(f"Could not convert {src} to WebP: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            continue
+        if os.path.getsize(tmp) >= os.path.getsize(src):
+            os.remove(tmp)
+            continue
+        saved += os.path.getsize(src) - os.path.getsize(tmp)
+        _replace(src, tmp, dst)
+        ocr_path = os.path.join(session_dir, f"ocr_{name}.txt")
+        if os.path.exists(ocr_path):
+            os.replace(ocr_path, os.path.join(session_dir, f"ocr_{webp_name}.txt"))
+        renamed[name] = webp_name
+
+    manifest = os.path.join(session_dir, SCREENSHOT_MANIFEST)
+    if renamed and os.path.exists(manifest):
+        with open(manifest, "r", encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        tmp = f"{manifest}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in entries:
+                entry["file"] = renamed.get(entry.get("file"), entry.get("file"))
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp, manifest)  # newer mtime, so the cached timeline picks up the new names
+    if renamed:
+        logging.info(f"Converted {len(renamed)} screenshot(s) in {session_dir} to WebP ({saved / 1e6:.1f} MB saved)")
+    return len(renamed), saved
+
+def audio_compaction_available() -> bool:
+    return importlib.util.find_spec("soundfile") is not None
+
+def needs_compaction(session: dict) -> bool:
+    """Whether a catalogue usage() row is worth a compaction pass.
+
+    After the first pass, remaining PNGs are ones WebP did not shrink, so only a WAV that can be
+    transcoded (soundfile installed since, or a failed transcode) is worth another pass.
+    """
+    if not session["uncompressed"]:
+        return False
+    return not session["compacted"] or (session["wav"] and audio_compaction_available())
+
+def compact_session(session_dir: str, images: bool = True) -> dict:
+    """Compresses the recording and (unless images=False) the screenshots of one finished session."""
+    report = {"session": os.path.basename(session_dir), "audio_saved": 0}
+    try:
+        report["audio_saved"] = compact_audio(session_dir)
+    except ImportError:
+        report["audio_error"] = "soundfile is not installed"
+    except (OSError, RuntimeError) as e:
+        logging.error(f"Audio compaction of {session_dir} failed: {e}")
+        report["audio_error"] = str(e)
+    report["screenshots"], report["images_saved"] = compact_screenshots(session_dir) if images else (0, 0)
+    return report
+
+def evict_media(session_dir: str) -> int:
+    """Deletes the session's recording and screenshots; returns the bytes freed."""
+    freed = 0
+    for name in os.listdir(session_dir):
+        if name in AUDIO_FILES or is_screenshot(name):
+            path = os.path.join(session_dir, name)
+            freed += os.path.getsize(path)
+            os.remove(path)
+    return freed
+
+def retention_candidates(sessions, now: float, max_age_days: float, max_total_mb: float, evict: str) -> list:
+    """Ids to evict from `sessions` ([{id, created, size, media}], oldest first)."""
+    def freed(session):
+        return session["size"] if evict == "session" else session["media"]
+
+    chosen = []
+    total = sum(s["size"] for s in sessions)
+    for session in sessions:
+        too_old = max_age_days > 0 and now - session["created"] > max_age_days * 86400
+        too_big = max_total_mb > 0 and total > max_total_mb * 1e6
+        if (too_old or too_big) and freed(session) > 0:
+            chosen.append(session["id"])
+            total -= freed(session)
+    return chosen
+
+def apply_retention(catalog, exclude=(), max_age_days=RETENTION_MAX_AGE_DAYS, max_total_mb=RETENTION_MAX_TOTAL_MB,
+                    evict=RETENTION_EVICT, lock=None) -> dict:
+    """Evicts the oldest catalogued sessions past the age/size limits; `exclude` ids are never touched.
+
+    `lock(session_id)` returns the session's media lock; sessions whose lock is held are skipped this time.
+    """
+    if evict not in ("media", "session"):
+        raise ValueError(f"Unknown RETENTION_EVICT mode: {evict}")
+    report = {"evicted": [], "freed_bytes": 0}
+    if max_age_days <= 0 and max_total_mb <= 0:
+        return report
+    sessions = [s for s in catalog.usage() if not s["recording"] and s["id"] not in exclude]
+    for session_id in retention_candidates(sessions, time.time(), max_age_days, max_total_mb, evict):
+        session_lock = lock(session_id) if lock else None
+        if session_lock and not session_lock.acquire(blocking=False):
+            continue
+        try:
+            session_dir = os.path.join(catalog.sessions_dir, session_id)
+            if not os.path.isdir(session_dir):
+                catalog.remove(session_id)
+                continue
+            if evict == "session":
+                freed = sum(entry.stat().st_size for entry in os.scandir(session_dir) if entry.is_file())
+                shutil.rmtree(session_dir)
+                catalog.remove(session_id)
+            else:
+                freed = evict_media(session_dir)
+                catalog.sync(session_id)
+        finally:
+            if session_lock:
+                session_lock.release()
+        report["evicted"].append(session_id)
+        report["freed_bytes"] += freed
+    if report["evicted"]:
+        logging.info(
+            f"Retention evicted {len(report['evicted'])} session(s) ({evict}), {report['freed_bytes'] / 1e6:.1f} MB freed"
+        )
+    return report
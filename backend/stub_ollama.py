@@ -0,0 +1,146 @@
+"""Minimal stand-in for the Ollama HTTP API, for tests and benchmarks without a GPU.
+
+Serves /api/chat, /api/generate and /api/tags, streaming a canned LectureSummary
+token by token, and /api/embed with hashed bag-of-words vectors. Run it with `python stub_ollama.py --port 11435` and point
+OLLAMA_URL at it, or call start_stub_server() in-process.
+"""
+import re
+import json
+import time
+import zlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_SUMMARY = {
+    "overview": "A stub lecture about testing summarization pipelines without a language model.",
+    "core_concepts": ["Stub servers", "Streaming responses", "Structured output"],
+    "detailed_explanation": "The stub streams this JSON object in small pieces so clients exercise their streaming path.",
+    "examples": "Pointing OLLAMA_URL at the stub during benchmarks.",
+    "takeaways": ["Test offline", "Keep responses deterministic"],
+    "questions": [
+        {"question": "Why use a stub server?", "answer": "To test without a real model."},
+        {"question": "What does the stub stream?", "answer": "A canned JSON summary."},
+        {"question": "How is it started?", "answer": "With start_stub_server() or from the command line."},
+    ],
+    "resources": [
+        {"title": "Ollama API", "type": "Docs", "url": "https://github.com/ollama/ollama/blob/main/docs/api.md"},
+        {"title": "http.server", "type": "Docs", "url": "https://docs.python.org/3/library/http.server.html"},
+    ],
+}
+
+EMBED_DIM = 64
+
+def stub_embedding(text: str) -> list:
+    """Deterministic unit vector of hashed word counts, so texts sharing words are similar."""
+    vector = [0.0] * EMBED_DIM
+    for word in re.findall(r"\w+", text.lower()):
+        vector[zlib.crc32(word.encode("utf-8")) % EMBED_DIM] += 1.0
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": self.server.model}]})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.server.requests.append({"path": self.path, "body": body})
+        if self.path == "/api/chat":
+            messages = body.get("messages", [])
+            partial = messages[-1]["content"] if messages and messages[-1]["role"] == "assistant" else ""
+            self._respond(body, partial, lambda token: {"message": {"role": "assistant", "content": token}})
+        elif self.path == "/api/generate":
+            self._respond(body, "", lambda token: {"response": token})
+        elif self.path == "/api/embed":
+            texts = body.get("input", [])
+            texts = [texts] if isinstance(texts, str) else texts
+            self._send_json({"model": body.get("model"), "embeddings": [stub_embedding(t) for t in texts]})
+        else:
+            self.send_error(404)
+
+    def _respond(self, body, partial, wrap):
+        try:
+            self._stream(body, partial, wrap)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # client went away mid-stream
+
+    def _stream(self, body, partial, wrap):
+        text = self.server.response_text
+        # A resumed request continues after the text the client already has
+        remaining = text[len(partial):] if text.startswith(partial) else text
+        if body.get("stream", True) is False:
+            self._send_json({**wrap(remaining), "done": True})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        fail_after = self.server.fail_after
+        sent = 0
+        for i in range(0, len(remaining), self.server.token_chars):
+            if fail_after is not None and sent >= fail_after:
+                # Simulate a dropped connection mid-stream (only once)
+                self.server.fail_after = None
+                self.close_connection = True
+                return
+            token = remaining[i:i + self.server.token_chars]
+            self._write_chunk(json.dumps({**wrap(token), "done": False}) + "\n")
+            sent += len(token)
+            if self.server.token_delay:
+                time.sleep(self.server.token_delay)
+        self._write_chunk(json.dumps({**wrap(""), "done": True, "model": self.server.model}) + "\n")
+        self._write_chunk("")
+
+    def _write_chunk(self, data: str):
+        raw = data.encode("utf-8")
+        self.wfile.write(f"{len(raw):X}\r\n".encode() + raw + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, payload):
+        raw = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+def start_stub_server(port=0, response_text=None, token_chars=8, token_delay=0.0, fail_after=None, model="stub"):
+    """Starts the stub in a daemon thread; returns the server (its URL is server.url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubOllamaHandler)
+    server.response_text = response_text if response_text is not None else json.dumps(CANNED_SUMMARY)
+    server.token_chars = token_chars
+    server.token_delay = token_delay
+    server.fail_after = fail_after
+    server.model = model
+    server.requests = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name="StubOllama", daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Ollama server")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between streamed tokens")
+    parser.add_argument("--fail-after", type=int, help="drop the first stream after this many characters")
+    args = parser.parse_args()
+    server = start_stub_server(args.port, token_delay=args.token_delay, fail_after=args.fail_after)
+    print(f"Stub Ollama listening on {server.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
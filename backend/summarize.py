@@ -1,15 +1,22 @@
 import os
 import json
-import requests
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field, ValidationError
 from typing import List, Dict
-from langchain.output_parsers import PydanticOutputParser
+from ollama_client import get_client, OllamaError, OLLAMA_MODEL
+import metrics
 
 # === Load environment variables ===
 load_dotenv()
-OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:latest")
-OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+
+# === Map-reduce summarization for inputs that do not fit one prompt ===
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", 3000))
+SUMMARY_CHUNK_OVERLAP = int(os.getenv("SUMMARY_CHUNK_OVERLAP", 200))  # tokens shared by neighbouring chunks
+# Parallel chunk requests; Ollama only runs them concurrently with OLLAMA_NUM_PARALLEL > 1
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", 2))
+CHARS_PER_TOKEN = 4  # rough estimate for English text
 
 # === System prompt for structured note generation ===
 SYSTEM_PROMPT = (
@@ -45,6 +52,28 @@ SYSTEM_PROMPT = (
     "}"
 )
 
+# === Prompt for merging partial summaries of consecutive lecture parts ===
+REDUCE_PROMPT = (
+    "You are an expert educational assistant. You are given several partial JSON summaries, each covering a consecutive part of the same lecture, in order. "
+    "Merge them into ONE summary of the whole lecture that follows exactly the same JSON schema as the inputs. "
+    "Write a single overview for the whole lecture, combine the detailed explanations in lecture order, remove duplicate concepts, takeaways, questions and resources, "
+    "and keep at least 3 revision questions and 2 resources. "
+    "Your response MUST ONLY contain the JSON object and NOTHING else. No markdown, code fences, explanations or commentary."
+)
+
+# Identifies the prompts and chunking that produced a summary; part of the summary cache key
+PROMPT_VERSION = hashlib.sha1(
+    f"{SYSTEM_PROMPT}|{REDUCE_PROMPT}|{SUMMARY_CHUNK_TOKENS}|{SUMMARY_CHUNK_OVERLAP}".encode("utf-8")
+).hexdigest()[:12]
+
+def summary_cache_key(text: str, model: str = OLLAMA_MODEL, prompt_version: str = PROMPT_VERSION) -> str:
+    """Content address of a summary: hash of the input text, model name and prompt version."""
+    h = hashlib.sha256()
+    for part in (model, prompt_version, text):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
 def try_fix_json(raw_text: str) -> str:
     """
     A simple heuristic to fix slight JSON malformation.
@@ -74,64 +103,121 @@ class LectureSummary(BaseModel):
     questions: List[Question]
     resources: List[Resource]
 
-# Initialize output parser using LangChain's PydanticOutputParser
-output_parser = PydanticOutputParser(pydantic_object=LectureSummary)
+class SummaryStreamParser:
+    """Incrementally parses a streamed JSON object, reporting each top-level field once it closes.
 
-def summarize(text: str) -> dict:
-    print("INFO: Starting structured summarization via Ollama")
-    if not text.strip():
-        print("WARN: Empty text provided to summarizer")
-        return {}
+    Feed it model tokens as they arrive; `feed()` returns the (key, value) pairs completed by
+    that piece. Anything before the first '{' (stray prose, code fences) is ignored.
+    """
 
-    full_prompt = f"{SYSTEM_PROMPT}\n\nLecture Content:\n{text}"
-    combined = ""
-    use_stream = True
+    def __init__(self):
+        self.fields = {}
+        self.started = False
+        self.finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._mode = None  # "key" or "value" while capturing at the top level
+        self._key = None
+        self._capture = []
 
-    try:
-        print("INFO: Sending streaming request to Ollama")
-        response = requests.post(
-            f"{OLLAMA_URL}/api/generate",
-            json={"model": OLLAMA_MODEL, "prompt": full_prompt},
-            timeout=300,
-            stream=True
-        )
-        response.raise_for_status()
-        print(f"INFO: Ollama streaming response status: {response.status_code}")
-
-        for line in response.iter_lines(decode_unicode=True):
-            if not line:
+    def feed(self, text: str) -> list:
+        completed = []
+        for ch in text:
+            if self.finished:
+                break
+            if not self.started:
+                if ch == '{':
+                    self.started = True
+                    self._depth = 1
                 continue
-            try:
-                obj = json.loads(line)
-                combined += obj.get("response", "")
-            except json.JSONDecodeError:
-                combined += line
-
-        combined = combined.strip()
-        print("DEBUG: Raw streamed response:")
-        print(combined)
-
-    except Exception as e:
-        print(f"WARN: Streaming failed ({e}), falling back to non-streaming mode")
-        use_stream = False
+            if self._in_string:
+                if self._mode:
+                    self._capture.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._mode == "key" and self._depth == 1:
+                        self._key = json.loads("".join(self._capture))
+                        self._mode, self._capture = None, []
+                continue
+            if self._mode is None:
+                # Between fields of the top-level object
+                if ch == '"' and self._key is None:
+                    self._mode, self._capture, self._in_string = "key", ['"'], True
+                elif ch == ':' and self._key is not None:
+                    self._mode, self._capture = "value", []
+                elif ch == '}':
+                    self.finished = True
+                continue
+            if self._depth == 1 and ch in ',}':
+                field = self._close_value()
+                if field:
+                    completed.append(field)
+                self.finished = ch == '}'
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+            self._capture.append(ch)
+        return completed
 
-    if not use_stream:
+    def _close_value(self):
+        key, raw = self._key, "".join(self._capture).strip()
+        self._key, self._mode, self._capture = None, None, []
         try:
-            print("INFO: Sending non-streaming request to Ollama")
-            resp = requests.post(
-                f"{OLLAMA_URL}/api/generate",
-                json={"model": OLLAMA_MODEL, "prompt": full_prompt, "stream": False},
-                timeout=300
-            )
-            resp.raise_for_status()
-            payload = resp.json()
-            combined = payload.get("response", "").strip()
-            print("DEBUG: Raw non-streamed response:")
-            print(combined)
-        except Exception as ex:
-            print(f"ERROR: Non-streaming fallback failed: {ex}")
-            return {"raw": combined or "No response received."}
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return None  # left for parse_summary() to repair from the full response
+        self.fields[key] = value
+        return key, value
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def split_into_chunks(text: str, chunk_tokens: int = SUMMARY_CHUNK_TOKENS, overlap_tokens: int = SUMMARY_CHUNK_OVERLAP) -> List[str]:
+    """Splits text on word boundaries into token-budgeted chunks that overlap slightly."""
+    words = text.split()
+    budget = max(1, chunk_tokens * CHARS_PER_TOKEN)
+    overlap = min(overlap_tokens * CHARS_PER_TOKEN, budget // 2)
+    chunks = []
+    start = 0
+    while start < len(words):
+        end, size = start, 0
+        while end < len(words) and (size + len(words[end]) + 1 <= budget or end == start):
+            size += len(words[end]) + 1
+            end += 1
+        chunks.append(" ".join(words[start:end]))
+        if end >= len(words):
+            break
+        # Step back far enough to repeat ~overlap characters at the start of the next chunk
+        back, kept = end, 0
+        while back > start + 1 and kept + len(words[back - 1]) + 1 <= overlap:
+            back -= 1
+            kept += len(words[back]) + 1
+        start = back
+    return chunks
+
+def generate(prompt: str, on_token=None):
+    """Returns the model's raw response to the prompt, or None if Ollama could not be reached."""
+    try:
+        print("INFO: Sending streaming request to Ollama")
+        # Pooled keep-alive client; a dropped stream is resumed instead of re-sending from scratch
+        combined = get_client().generate(prompt, on_token=on_token, model=OLLAMA_MODEL).strip()
+    except OllamaError as ex:
+        print(f"ERROR: Ollama request failed: {ex}")
+        return None
+    print(f"DEBUG: Streamed response complete ({len(combined)} characters)")
+    return combined
 
+def parse_summary(combined: str) -> dict:
+    """Extracts the JSON summary from a model response, or returns it as {"raw": ...}."""
     try:
         start = combined.find('{')
         end = combined.rfind('}')
@@ -153,6 +239,119 @@ def summarize(text: str) -> dict:
         print("INFO: Returning raw response instead of blank summary")
         return {"raw": combined}
 
+def _dedupe(items, key=lambda item: item):
+    seen, unique = set(), []
+    for item in items:
+        k = key(item)
+        k = k.strip().lower() if isinstance(k, str) else json.dumps(k, sort_keys=True)
+        if k and k not in seen:
+            seen.add(k)
+            unique.append(item)
+    return unique
+
+def merge_summaries(partials: List[dict]) -> dict:
+    """Deterministically merges partial LectureSummary dicts of consecutive lecture parts."""
+    def texts(field):
+        return [p[field].strip() for p in partials if isinstance(p.get(field), str) and p[field].strip()]
+
+    def items(field):
+        return [item for p in partials for item in (p.get(field) or [])]
+
+    return {
+        "overview": " ".join(texts("overview")),
+        "core_concepts": _dedupe(items("core_concepts")),
+        "detailed_explanation": "\n\n".join(texts("detailed_explanation")),
+        "examples": "\n\n".join(texts("examples")),
+        "takeaways": _dedupe(items("takeaways")),
+        "questions": _dedupe(items("questions"), key=lambda q: q.get("question", "") if isinstance(q, dict) else q),
+        "resources": _dedupe(items("resources"), key=lambda r: (r.get("url") or r.get("title", "")) if isinstance(r, dict) else r),
+    }
+
+def _summarize_prompt(prompt: str, on_field=None) -> dict:
+    on_token = None
+    if on_field:
+        parser = SummaryStreamParser()
+
+        def on_token(token):
+            for key, value in parser.feed(token):
+                on_field(key, value)
+
+    combined = generate(prompt, on_token)
+    if combined is None:
+        return {"raw": "No response received."}
+    return parse_summary(combined)
+
+def _reduce_group(group: List[dict]) -> dict:
+    if len(group) == 1:
+        return group[0]
+    parts = "\n\n".join(f"Part {i}:\n{json.dumps(p, ensure_ascii=False)}" for i, p in enumerate(group, 1))
+    merged = _summarize_prompt(f"{REDUCE_PROMPT}\n\nPartial summaries:\n{parts}")
+    if "raw" in merged:
+        print("WARN: LLM merge failed, merging partial summaries directly")
+        return merge_summaries(group)
+    return merged
+
+def reduce_summaries(partials: List[dict], budget_tokens: int = SUMMARY_CHUNK_TOKENS, concurrency: int = SUMMARY_CONCURRENCY) -> dict:
+    """Merges partial summaries level by level, packing as many as fit the token budget per LLM call."""
+    while len(partials) > 1:
+        groups, current, size = [], [], 0
+        for p in partials:
+            tokens = estimate_tokens(json.dumps(p, ensure_ascii=False))
+            if current and size + tokens > budget_tokens:
+                groups.append(current)
+                current, size = [], 0
+            current.append(p)
+            size += tokens
+        groups.append(current)
+        if len(groups) == len(partials):
+            # Nothing can be combined within the budget; fall back to a direct merge
+            return merge_summaries(partials)
+        print(f"INFO: Reducing {len(partials)} partial summaries in {len(groups)} group(s)")
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            partials = list(pool.map(_reduce_group, groups))
+    return partials[0]
+
+def summarize(text: str, chunk_tokens: int = SUMMARY_CHUNK_TOKENS, concurrency: int = SUMMARY_CONCURRENCY, on_field=None) -> dict:
+    """Returns the structured summary of `text`.
+
+    `on_field(key, value)` is called for each LectureSummary field as soon as it is known:
+    while the model streams for short inputs, after the reduce step for long ones.
+    """
+    print("INFO: Starting structured summarization via Ollama")
+    if not text.strip():
+        print("WARN: Empty text provided to summarizer")
+        return {}
+
+    if estimate_tokens(text) <= chunk_tokens:
+        with metrics.timer("summarize_stage_seconds", doc="Summarization time per stage", stage="single"):
+            return _summarize_prompt(f"{SYSTEM_PROMPT}\n\nLecture Content:\n{text}", on_field)
+
+    # Map: summarize overlapping chunks concurrently
+    chunks = split_into_chunks(text, chunk_tokens)
+    print(f"INFO: Input of ~{estimate_tokens(text)} tokens split into {len(chunks)} chunks")
+    prompts = [
+        f"{SYSTEM_PROMPT}\n\nLecture Content (part {i} of {len(chunks)}):\n{chunk}"
+        for i, chunk in enumerate(chunks, 1)
+    ]
+    with metrics.timer("summarize_stage_seconds", stage="map"):
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            results = list(pool.map(_summarize_prompt, prompts))
+
+    partials = [r for r in results if r and "raw" not in r]
+    if not partials:
+        print("ERROR: No chunk produced a structured summary")
+        return {"raw": "\n\n".join(r.get("raw", "") for r in results)}
+    if len(partials) < len(results):
+        print(f"WARN: {len(results) - len(partials)} chunk(s) could not be parsed and were skipped")
+
+    # Reduce: merge the partial LectureSummary results
+    with metrics.timer("summarize_stage_seconds", stage="reduce"):
+        merged = reduce_summaries(partials, chunk_tokens, concurrency)
+    if on_field:
+        for key, value in merged.items():
+            on_field(key, value)
+    return merged
+
 # Example usage:
 if __name__ == "__main__":
     lecture_text = "Your lecture transcript goes here..."
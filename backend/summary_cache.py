@@ -0,0 +1,57 @@
+import os
+import json
+import logging
+import threading
+
+# Content-addressed store of finished summaries: <key>.json, evicted oldest-used first
+SUMMARY_CACHE_DIR = os.getenv(
+    "SUMMARY_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "summaries")
+)
+SUMMARY_CACHE_MAX_MB = float(os.getenv("SUMMARY_CACHE_MAX_MB", 100))
+
+_lock = threading.Lock()
+
+def _path(key: str) -> str:
+    return os.path.join(SUMMARY_CACHE_DIR, key + ".json")
+
+def get(key: str):
+    """Returns the cached summary for `key`, or None."""
+    path = _path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            summary = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    os.utime(path)  # mark as recently used for eviction
+    logging.info(f"Summary cache hit {key[:12]}")
+    return summary
+
+def put(key: str, summary: dict):
+    """Stores a summary and evicts least recently used entries beyond SUMMARY_CACHE_MAX_MB."""
+    os.makedirs(SUMMARY_CACHE_DIR, exist_ok=True)
+    path = _path(key)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    evict()
+
+def evict(max_bytes: float = None):
+    """Deletes least recently used entries until the cache fits in max_bytes."""
+    max_bytes = SUMMARY_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+    with _lock:
+        entries = []
+        for entry in os.scandir(SUMMARY_CACHE_DIR):
+            if entry.name.endswith(".json"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                logging.info(f"Evicted cached summary {os.path.basename(path)}")
+            except FileNotFoundError:
+                pass
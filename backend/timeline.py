@@ -0,0 +1,186 @@
+import os
+import json
+import logging
+import threading
+
+import numpy as np
+
+from storage import (
+    session_audio, audio_duration, is_screenshot, SEGMENTS_FILE, SCREENSHOT_MANIFEST, SCREENSHOT_INTERVAL,
+    OCR_COMBINED_FILE,
+)
+
+# Per-session timeline of transcript segments and slides, stored column-wise in timeline.npz.
+# Strings are kept as one UTF-8 blob per column plus offsets, so the file loads without pickle.
+TIMELINE_FILE = "timeline.npz"
+
+_lock = threading.Lock()
+
+def _pack(texts):
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def _unpack(blob, offsets, i) -> str:
+    return blob[offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+def _read_jsonl(path):
+    entries = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        logging.warning(f"Skipping malformed line in {path}")
+    except FileNotFoundError:
+        pass
+    return entries
+
+class Timeline:
+    """Transcript segments (start, end, text) and slides (time, file, OCR text) of one session."""
+
+    def __init__(self, seg_start, seg_end, seg_text, slide_time, slide_file, slide_text):
+        order = np.argsort(seg_start, kind="stable")
+        self.seg_start = np.asarray(seg_start, dtype=np.float32)[order]
+        self.seg_end = np.asarray(seg_end, dtype=np.float32)[order]
+        self.seg_blob, self.seg_offsets = _pack([seg_text[i] for i in order])
+        order = np.argsort(slide_time, kind="stable")
+        self.slide_time = np.asarray(slide_time, dtype=np.float32)[order]
+        self.slide_file_blob, self.slide_file_offsets = _pack([slide_file[i] for i in order])
+        self.slide_blob, self.slide_offsets = _pack([slide_text[i] for i in order])
+        self._index()
+
+    def _index(self):
+        # Running max of segment ends keeps the lower bound of a window query a binary search
+        self._seg_end_max = np.maximum.accumulate(self.seg_end) if len(self.seg_end) else self.seg_end
+
+    @property
+    def duration(self) -> float:
+        ends = [float(self.seg_end.max())] if len(self.seg_end) else []
+        ends += [float(self.slide_time[-1])] if len(self.slide_time) else []
+        return max(ends, default=0.0)
+
+    @classmethod
+    def from_session(cls, session_dir: str) -> "Timeline":
+        """Builds the timeline from the session's segment log, screenshot manifest and OCR files."""
+        segments = _read_jsonl(os.path.join(session_dir, SEGMENTS_FILE))
+        if not segments:
+            # Transcripts without timings (older sessions) become one segment spanning the recording
+            try:
+                with open(os.path.join(session_dir, "transcript.txt"), "r", encoding="utf-8") as f:
+                    text = f.read().strip()
+            except FileNotFoundError:
+                text = ""
+            if text:
+                # (without audio, assume ~150 words per minute)
+                end = audio_duration(session_audio(session_dir)) or len(text.split()) / 2.5
+                segments = [{"start": 0.0, "end": end, "text": text}]
+
+        slides = _read_jsonl(os.path.join(session_dir, SCREENSHOT_MANIFEST))
+        if not slides:
+            names = sorted(f for f in os.listdir(session_dir) if is_screenshot(f))
+            slides = [{"file": name, "offset": i * SCREENSHOT_INTERVAL} for i, name in enumerate(names)]
+        slide_text = []
+        for slide in slides:
+            try:
+                with open(os.path.join(session_dir, f"ocr_{slide['file']}.txt"), "r", encoding="utf-8") as f:
+                    slide_text.append(f.read().strip())
+            except FileNotFoundError:
+                slide_text.append("")
+
+        return cls(
+            [seg["start"] for seg in segments],
+            [seg["end"] for seg in segments],
+            [seg["text"] for seg in segments],
+            [slide["offset"] for slide in slides],
+            [slide["file"] for slide in slides],
+            slide_text,
+        )
+
+    def save(self, path: str):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f,
+                seg_start=self.seg_start, seg_end=self.seg_end,
+                seg_blob=self.seg_blob, seg_offsets=self.seg_offsets,
+                slide_time=self.slide_time,
+                slide_file_blob=self.slide_file_blob, slide_file_offsets=self.slide_file_offsets,
+                slide_blob=self.slide_blob, slide_offsets=self.slide_offsets,
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Timeline":
+        timeline = cls.__new__(cls)
+        with np.load(path, allow_pickle=False) as data:
+            for name in data.files:
+                setattr(timeline, name, data[name])
+        timeline._index()
+        return timeline
+
+    def segments(self, start: float = 0.0, end: float = float("inf")) -> list:
+        """Transcript segments overlapping [start, end), in time order."""
+        lo = int(np.searchsorted(self._seg_end_max, start, side="right"))
+        hi = int(np.searchsorted(self.seg_start, end, side="left"))
+        return [
+            {
+                "start": round(float(self.seg_start[i]), 2),
+                "end": round(float(self.seg_end[i]), 2),
+                "text": _unpack(self.seg_blob, self.seg_offsets, i),
+            }
+            for i in range(lo, hi)
+            if self.seg_end[i] > start
+        ]
+
+    def slides(self, start: float = 0.0, end: float = float("inf")) -> list:
+        """Slides on screen during [start, end): each one shows until the next is captured."""
+        lo = max(int(np.searchsorted(self.slide_time, start, side="right")) - 1, 0)
+        hi = int(np.searchsorted(self.slide_time, end, side="left"))
+        return [
+            {
+                "time": round(float(self.slide_time[i]), 2),
+                "file": _unpack(self.slide_file_blob, self.slide_file_offsets, i),
+                "text": _unpack(self.slide_blob, self.slide_offsets, i),
+            }
+            for i in range(lo, hi)
+        ]
+
+    def window(self, start: float = 0.0, end: float = float("inf")) -> dict:
+        """Transcript and slide text for the time window [start, end) in seconds."""
+        segments = self.segments(start, end)
+        slides = self.slides(start, end)
+        return {
+            "start": start,
+            "end": min(end, self.duration),
+            "segments": segments,
+            "slides": slides,
+            "transcript": " ".join(seg["text"] for seg in segments),
+            "slide_text": "\n\n".join(slide["text"] for slide in slides if slide["text"]),
+        }
+
+def _sources(session_dir):
+    names = [SEGMENTS_FILE, SCREENSHOT_MANIFEST, "transcript.txt", OCR_COMBINED_FILE]
+    return [os.path.join(session_dir, name) for name in names if os.path.exists(os.path.join(session_dir, name))]
+
+def load_timeline(session_dir: str) -> Timeline:
+    """Returns the session timeline, rebuilding timeline.npz when a source file is newer."""
+    path = os.path.join(session_dir, TIMELINE_FILE)
+    with _lock:
+        if os.path.exists(path):
+            built = os.path.getmtime(path)
+            if all(os.path.getmtime(src) <= built for src in _sources(session_dir)):
+                try:
+                    return Timeline.load(path)
+                except (OSError, ValueError, KeyError) as e:
+                    logging.warning(f"Rebuilding unreadable timeline {path}: {e}")
+        timeline = Timeline.from_session(session_dir)
+        timeline.save(path)
+        logging.info(
+            f"Timeline built for {session_dir}: {len(timeline.seg_start)} segments, {len(timeline.slide_time)} slides"
+        )
+        return timeline
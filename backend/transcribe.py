@@ -1,15 +1,33 @@
 import os
+import sys
+import json
+import glob
+import time
+import wave
+import queue
+import argparse
 import logging
+import threading
+import importlib.util
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+import numpy as np
 
-try:
-    import whisper
-except ImportError:
-    whisper = None
+import metrics
+from storage import session_audio, read_pcm, SEGMENTS_FILE
+
+# whisper (PyTorch) and faster_whisper are imported on first model load, not at import time
 
 load_dotenv()
 
 OPENAI_MODEL = os.getenv("WHISPER_MODEL", "base")
+# "whisper" (OpenAI, PyTorch) or "faster-whisper" (CTranslate2, fast on CPU)
+TRANSCRIBE_BACKEND = os.getenv("TRANSCRIBE_BACKEND", "whisper")
+FASTER_WHISPER_COMPUTE_TYPE = os.getenv("FASTER_WHISPER_COMPUTE_TYPE", "int8")
+FASTER_WHISPER_CPU_THREADS = max(1, int(os.getenv("FASTER_WHISPER_CPU_THREADS", 4)))  # per decode
+# How many distinct Whisper model sizes may stay resident at once (LRU-evicted beyond that).
+MODEL_CACHE_SIZE = max(1, int(os.getenv("WHISPER_MODEL_CACHE_SIZE", 1)))
 
 LOG_DIR = os.path.join(os.getcwd(), "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
@@ -20,20 +38,283 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(message)s"
 )
 
-def transcribe(audio_path: str) -> str:
+WHISPER_SAMPLE_RATE = 16000  # Whisper consumes 16 kHz mono float32
+# Anti-aliasing filter applied before downsampling to 16 kHz (windowed-sinc FIR, odd length)
+RESAMPLE_TAPS = 129
+RESAMPLE_CUTOFF = 0.45  # of the target rate, i.e. 7.2 kHz: below the new Nyquist frequency
+
+# Voice activity detection: drop silent spans before decoding
+TRANSCRIBE_VAD = os.getenv("TRANSCRIBE_VAD", "true").lower() in ("1", "true", "yes")
+VAD_FRAME_MS = 30
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", 12))  # frame energy above the noise floor
+VAD_MIN_DB = -65.0  # never treat frames quieter than this (dBFS) as speech
+VAD_MIN_SILENCE = float(os.getenv("VAD_MIN_SILENCE", 0.8))  # shorter pauses stay in the audio
+VAD_PADDING = float(os.getenv("VAD_PADDING", 0.2))  # seconds kept around each speech span
+
+class WhisperBackend:
+    """OpenAI Whisper on PyTorch."""
+    name = "whisper"
+    # model.transcribe installs hooks on the shared model, so decodes must not overlap
+    thread_safe = False
+
+    @staticmethod
+    def available():
+        return importlib.util.find_spec("whisper") is not None
+
+    @staticmethod
+    def parallel_decodes():
+        return 1
+
+    @staticmethod
+    def load(model_name):
+        import whisper
+        return whisper.load_model(model_name)
+
+    @staticmethod
+    def transcribe(model, audio):
+        result = model.transcribe(audio)
+        return [{"start": seg["start"], "end": seg["end"], "text": seg["text"]} for seg in result.get("segments", [])]
+
+    @staticmethod
+    def decode_file(audio_path):
+        import whisper
+        return whisper.load_audio(audio_path)
+
+class FasterWhisperBackend:
+    """faster-whisper (CTranslate2) with quantized weights, tuned for CPU-only servers."""
+    name = "faster-whisper"
+    thread_safe = True
+
+    @staticmethod
+    def available():
+        return importlib.util.find_spec("faster_whisper") is not None
+
+    @staticmethod
+    def parallel_decodes():
+        return max(1, (os.cpu_count() or 1) // FASTER_WHISPER_CPU_THREADS)
+
+    @staticmethod
+    def load(model_name):
+        import faster_whisper
+        return faster_whisper.WhisperModel(
+            model_name,
+            device="cpu",
+            compute_type=FASTER_WHISPER_COMPUTE_TYPE,
+            cpu_threads=FASTER_WHISPER_CPU_THREADS,
+            num_workers=FasterWhisperBackend.parallel_decodes(),
+        )
+
+    @staticmethod
+    def transcribe(model, audio):
+        segments, _ = model.transcribe(audio, beam_size=5)
+        return [{"start": seg.start, "end": seg.end, "text": seg.text} for seg in segments]
+
+    @staticmethod
+    def decode_file(audio_path):
+        import faster_whisper
+        return faster_whisper.decode_audio(audio_path, sampling_rate=WHISPER_SAMPLE_RATE)
+
+BACKENDS = {backend.name: backend for backend in (WhisperBackend, FasterWhisperBackend)}
+
+def get_backend(name: str = None):
+    """Returns the transcription backend `name` (default: TRANSCRIBE_BACKEND)."""
+    backend = BACKENDS.get(name or TRANSCRIBE_BACKEND)
+    if backend is None:
+        raise ValueError(f"Unknown transcription backend '{name or TRANSCRIBE_BACKEND}'")
+    if not backend.available():
+        raise RuntimeError(f"{backend.name} not installed.")
+    return backend
+
+# Process-wide model registry: "backend:model name" -> loaded model
+_model_cache: "OrderedDict[str, object]" = OrderedDict()
+_model_lock = threading.Lock()
+_decode_lock = threading.Lock()  # serialises decodes on backends that are not thread-safe
+_model_stats = {"hits": 0, "misses": 0, "evictions": 0, "load_seconds": {}}
+
+def get_model(name: str = OPENAI_MODEL, backend: str = None):
+    """Returns the Whisper model `name` for the backend, loading it once per process."""
+    backend = get_backend(backend)
+    key = f"{backend.name}:{name}"
+
+    with _model_lock:
+        model = _model_cache.get(key)
+        if model is not None:
+            _model_cache.move_to_end(key)
+            _model_stats["hits"] += 1
+            metrics.inc("model_cache_requests_total", result="hit")
+            return model
+
+        _model_stats["misses"] += 1
+        metrics.inc("model_cache_requests_total", result="miss")
+        logging.info(f"Loading Whisper model '{key}'")
+        start = time.perf_counter()
+        model = backend.load(name)
+        elapsed = time.perf_counter() - start
+        _model_stats["load_seconds"][key] = round(elapsed, 3)
+        metrics.observe("model_load_seconds", elapsed, doc="Whisper model load time", backend=backend.name, model=name)
+        logging.info(f"Whisper model '{key}' loaded in {elapsed:.2f}s")
+
+        _model_cache[key] = model
+        while len(_model_cache) > MODEL_CACHE_SIZE:
+            evicted, _ = _model_cache.popitem(last=False)
+            _model_stats["evictions"] += 1
+            logging.info(f"Evicted Whisper model '{evicted}' from cache")
+        return model
+
+def warm_up(names=None):
+    """Preloads the given models (default: WHISPER_MODEL) of the default backend so the first request skips the load."""
+    for name in names or [OPENAI_MODEL]:
+        try:
+            get_model(name)
+        except Exception as e:
+            logging.exception(f"Warm-up of Whisper model '{name}' failed: {e}")
+
+def model_cache_stats() -> dict:
+    """Returns cache hit/miss counts, resident models and per-model load times."""
+    with _model_lock:
+        return {
+            "backend": TRANSCRIBE_BACKEND,
+            "vad": TRANSCRIBE_VAD,
+            "resident": list(_model_cache.keys()),
+            "capacity": MODEL_CACHE_SIZE,
+            "hits": _model_stats["hits"],
+            "misses": _model_stats["misses"],
+            "evictions": _model_stats["evictions"],
+            "load_seconds": dict(_model_stats["load_seconds"]),
+        }
+
+def speech_spans(audio, samplerate: int = WHISPER_SAMPLE_RATE, threshold_db: float = VAD_THRESHOLD_DB,
+                 min_silence: float = VAD_MIN_SILENCE, padding: float = VAD_PADDING):
+    """Returns [(start, end)] sample ranges containing speech, by frame energy above the noise floor."""
+    frame = int(samplerate * VAD_FRAME_MS / 1000)
+    n = len(audio) // frame
+    if n == 0:
+        return [(0, len(audio))] if len(audio) else []
+    frames = np.asarray(audio[:n * frame], dtype=np.float32).reshape(n, frame)
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    # Above the noise floor, but never so high that a clip without pauses is dropped
+    floor, peak = np.percentile(energy_db, [10, 99])
+    threshold = max(min(floor + threshold_db, peak - threshold_db), VAD_MIN_DB)
+    voiced = np.flatnonzero(energy_db > threshold)
+    if not len(voiced):
+        return []
+
+    # Pauses shorter than min_silence do not split a span
+    breaks = np.flatnonzero(np.diff(voiced) > int(min_silence * 1000 / VAD_FRAME_MS))
+    starts = np.concatenate(([voiced[0]], voiced[breaks + 1])) * frame
+    ends = (np.concatenate((voiced[breaks], [voiced[-1]])) + 1) * frame
+    pad = int(padding * samplerate)
+    spans = []
+    for start, end in zip(starts - pad, ends + pad):
+        start, end = max(0, int(start)), min(len(audio), int(end))
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+def _decode(backend, model, audio) -> list:
+    if backend.thread_safe:
+        return backend.transcribe(model, audio)
+    with _decode_lock:
+        return backend.transcribe(model, audio)
+
+def transcribe_audio(audio, model_name: str = OPENAI_MODEL, backend: str = None, vad: bool = TRANSCRIBE_VAD) -> list:
+    """Transcribes 16 kHz mono float32 audio; returns segments with start/end in seconds."""
+    backend = get_backend(backend)
+    model = get_model(model_name, backend.name)
+    start = time.perf_counter()
+    segments = _transcribe_audio(backend, model, audio, vad)
+    elapsed = time.perf_counter() - start
+    audio_seconds = len(audio) / WHISPER_SAMPLE_RATE
+    labels = {"backend": backend.name, "model": model_name}
+    metrics.observe("transcribe_seconds", elapsed, doc="Decode time per transcription call", **labels)
+    metrics.inc("transcribe_audio_seconds_total", audio_seconds, doc="Seconds of audio transcribed", **labels)
+    if audio_seconds:
+        metrics.observe(
+            "transcribe_rtf", elapsed / audio_seconds, metrics.RATIO_BUCKETS,
+            doc="Real-time factor (decode seconds per audio second)", **labels,
+        )
+    return segments
+
+def _transcribe_audio(backend, model, audio, vad: bool) -> list:
+    if not vad:
+        return _decode(backend, model, audio)
+
+    spans = speech_spans(audio)
+    if not spans:
+        logging.info("No speech detected; skipping decode")
+        return []
+    kept = sum(end - start for start, end in spans)
+    logging.info(f"VAD kept {kept / max(len(audio), 1):.0%} of the audio in {len(spans)} span(s)")
+    metrics.inc("vad_dropped_audio_seconds_total", (len(audio) - kept) / WHISPER_SAMPLE_RATE, doc="Silence skipped by VAD")
+    segments = _decode(backend, model, np.concatenate([audio[start:end] for start, end in spans]))
+
+    # Map times in the speech-only audio back onto the original timeline
+    offsets = np.cumsum([0] + [end - start for start, end in spans])
+
+    def to_original(seconds, side):
+        pos = seconds * WHISPER_SAMPLE_RATE
+        i = min(max(int(np.searchsorted(offsets, pos, side=side)) - 1, 0), len(spans) - 1)
+        return round(float(spans[i][0] + pos - offsets[i]) / WHISPER_SAMPLE_RATE, 2)
+
+    return [
+        {**seg, "start": to_original(seg["start"], "right"), "end": to_original(seg["end"], "left")}
+        for seg in segments
+    ]
+
+def load_audio(audio_path: str, backend: str = None):
+    """Reads an audio file as 16 kHz mono float32.
+
+    PCM WAV is read directly, compressed session audio (FLAC, Opus) with soundfile when it is
+    installed, and anything else through the backend's decoder (ffmpeg / PyAV). PCM at other rates
+    is low-pass filtered before it is downsampled (see to_whisper_audio).
+    """
+    try:
+        with wave.open(audio_path, "rb") as wf:
+            if wf.getsampwidth() == 2:
+                frames = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+                return to_whisper_audio(frames.reshape(-1, wf.getnchannels()), wf.getframerate())
+    except (wave.Error, EOFError):
+        pass
+    try:
+        return to_whisper_audio(*read_pcm(audio_path))
+    except (ImportError, RuntimeError):  # soundfile missing, or a format libsndfile cannot read
+        pass
+    return get_backend(backend).decode_file(audio_path)
+
+def transcribe_segments(audio_path: str, backend: str = None, vad: bool = TRANSCRIBE_VAD) -> list:
+    """Returns timestamped segments for the given audio file."""
+    logging.info(f"Transcribing {audio_path}")
+    return transcribe_audio(load_audio(audio_path, backend), OPENAI_MODEL, backend, vad)
+
+def write_transcript(session_dir: str, segments) -> str:
+    """Writes transcript.txt and its timestamped transcript_segments.jsonl; returns the text."""
+    segments = [
+        {"start": round(seg["start"], 2), "end": round(seg["end"], 2), "text": seg["text"].strip()}
+        for seg in segments
+        if seg["text"].strip()
+    ]
+    text = " ".join(seg["text"] for seg in segments)
+    with open(os.path.join(session_dir, SEGMENTS_FILE), "w", encoding="utf-8") as f:
+        for seg in segments:
+            f.write(json.dumps(seg, ensure_ascii=False) + "\n")
+    with open(os.path.join(session_dir, "transcript.txt"), "w", encoding="utf-8") as f:
+        f.write(text)
+    return text
+
+def transcribe(audio_path: str, backend: str = None, vad: bool = TRANSCRIBE_VAD) -> str:
     """Returns and stores transcription text for the given audio file."""
-    if whisper is None:
-        logging.error("Whisper not installed.")
+    try:
+        get_backend(backend)
+    except (ValueError, RuntimeError) as e:
+        logging.error(str(e))
         return ""
 
     try:
-        logging.info(f"Loading Whisper model '{OPENAI_MODEL}'")
-        model = whisper.load_model(OPENAI_MODEL)
+        segments = transcribe_segments(audio_path, backend, vad)
 
-        logging.info(f"Transcribing {audio_path}")
-        result = model.transcribe(audio_path)
-
-        text = result.get('text', '')
+        text = " ".join(seg["text"].strip() for seg in segments)
         logging.info("Transcription complete.")
 
         # Save transcription to .txt file
@@ -47,3 +328,250 @@ def transcribe(audio_path: str) -> str:
     except Exception as e:
         logging.exception(f"Transcription error: {e}")
         return ""
+
+def lowpass_kernel(cutoff: float, taps: int = RESAMPLE_TAPS):
+    """Blackman-windowed sinc FIR taps with unit DC gain; `cutoff` is a fraction of the sample rate."""
+    t = np.arange(taps) - (taps - 1) / 2
+    kernel = np.sinc(2 * cutoff * t) * np.blackman(taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+def lowpass(audio, cutoff: float, taps: int = RESAMPLE_TAPS):
+    """Zero-phase FIR low-pass of float32 audio; `cutoff` is a fraction of the sample rate."""
+    delay = (taps - 1) // 2
+    return np.convolve(audio, lowpass_kernel(cutoff, taps))[delay:delay + len(audio)]
+
+def to_whisper_audio(frames, samplerate: int):
+    """Converts int16 PCM frames (mono or multi-channel) to 16 kHz mono float32."""
+    audio = np.asarray(frames, dtype=np.float32) / 32768.0
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if samplerate > WHISPER_SAMPLE_RATE and len(audio):
+        # Content above 8 kHz would otherwise fold back into the speech band
+        audio = lowpass(audio, RESAMPLE_CUTOFF * WHISPER_SAMPLE_RATE / samplerate)
+    if samplerate != WHISPER_SAMPLE_RATE and len(audio):
+        positions = np.arange(0, len(audio), samplerate / WHISPER_SAMPLE_RATE)
+        audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+    return audio
+
+class StreamingTranscriber:
+    """Transcribes audio chunks as the recorder produces them.
+
+    Consumes ``(offset_seconds, frames)`` items from ``self.queue`` (``None`` ends the
+    stream), appends the text to ``transcript.txt`` and the timestamped segments to
+    ``transcript_segments.jsonl`` in the session directory.
+    """
+
+    def __init__(self, session_dir: str, samplerate: int, model_name: str = OPENAI_MODEL):
+        self.queue = queue.Queue()
+        self.session_dir = session_dir
+        self.samplerate = samplerate
+        self.model_name = model_name
+        self.transcript_path = os.path.join(session_dir, "transcript.txt")
+        self.segments_path = os.path.join(session_dir, SEGMENTS_FILE)
+        self.segments: list[dict] = []
+        self.failed_chunks = 0  # chunks whose text is missing from the transcript
+        self.done = False
+        self._emitted_until = 0.0
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="TranscriberThread", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def is_alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def _run(self):
+        for path in (self.transcript_path, self.segments_path):
+            open(path, "w", encoding="utf-8").close()
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break
+                offset, frames = item
+                try:
+                    self._transcribe_chunk(offset, frames)
+                except Exception as e:
+                    self.failed_chunks += 1
+                    logging.exception(f"Streaming transcription error at {offset:.1f}s: {e}")
+            logging.info(f"Streaming transcription finished ({len(self.segments)} segments)")
+        finally:
+            with self._cond:
+                self.done = True
+                self._cond.notify_all()
+
+    def _transcribe_chunk(self, offset: float, frames):
+        segments = transcribe_audio(to_whisper_audio(frames, self.samplerate), self.model_name)
+
+        new_segments = []
+        for seg in segments:
+            start, end = offset + seg["start"], offset + seg["end"]
+            # Segments centred in the overlap were already emitted by the previous chunk
+            if (start + end) / 2 < self._emitted_until:
+                continue
+            text = seg["text"].strip()
+            if text:
+                new_segments.append({"start": round(start, 2), "end": round(end, 2), "text": text})
+        if not new_segments:
+            return
+        self._emitted_until = new_segments[-1]["end"]
+
+        with open(self.transcript_path, "a", encoding="utf-8") as f:
+            f.write(" ".join(seg["text"] for seg in new_segments) + " ")
+        with open(self.segments_path, "a", encoding="utf-8") as f:
+            for seg in new_segments:
+                f.write(json.dumps(seg, ensure_ascii=False) + "\n")
+        with self._cond:
+            self.segments.extend(new_segments)
+            self._cond.notify_all()
+        logging.info(f"Transcribed chunk at {offset:.1f}s ({len(new_segments)} segments)")
+
+    def iter_segments(self, since: int = 0, heartbeat: float = 15.0):
+        """Yields segments from index `since` as they arrive; yields None as a keep-alive."""
+        index = since
+        while True:
+            with self._cond:
+                if index >= len(self.segments) and not self.done:
+                    self._cond.wait(heartbeat)
+                batch = self.segments[index:]
+                finished = self.done
+            yield from batch
+            index += len(batch)
+            if finished:
+                return
+            if not batch:
+                yield None
+
+def find_session_audio(targets) -> list:
+    """Expands session directories, glob patterns and audio files into a list of recordings."""
+    paths = []
+    for target in targets:
+        for match in sorted(glob.glob(target)) or [target]:
+            if os.path.isdir(match):
+                match = session_audio(match)
+            if match and os.path.isfile(match) and match not in paths:
+                paths.append(match)
+    return paths
+
+def transcript_up_to_date(audio_path: str) -> bool:
+    """True when the session's transcript.txt is newer than its recording."""
+    out_path = os.path.join(os.path.dirname(audio_path), "transcript.txt")
+    return os.path.exists(out_path) and os.path.getmtime(out_path) >= os.path.getmtime(audio_path)
+
+def batch_workers(backend: str = None) -> int:
+    """Decodes the backend can run side by side on this machine, plus one worker reading the next file."""
+    return get_backend(backend).parallel_decodes() + 1
+
+def _transcribe_file(audio_path: str, backend: str) -> dict:
+    session_dir = os.path.dirname(audio_path)
+    row = {"session": os.path.basename(session_dir), "audio": audio_path}
+    start = time.perf_counter()
+    try:
+        audio = load_audio(audio_path, backend)
+        text = write_transcript(session_dir, transcribe_audio(audio, OPENAI_MODEL, backend))
+    except Exception as e:
+        logging.exception(f"Batch transcription of {audio_path} failed: {e}")
+        return {**row, "status": "error", "error": str(e)}
+
+    seconds = time.perf_counter() - start
+    audio_seconds = len(audio) / WHISPER_SAMPLE_RATE
+    logging.info(f"Batch transcribed {audio_path}: {audio_seconds:.1f}s audio in {seconds:.1f}s")
+    return {
+        **row,
+        "status": "done",
+        "audio_seconds": round(audio_seconds, 2),
+        "seconds": round(seconds, 3),
+        "rtf": round(seconds / audio_seconds, 3) if audio_seconds else None,
+        "chars": len(text),
+    }
+
+def transcribe_batch(audio_paths, workers: int = None, force: bool = False, backend: str = None,
+                     progress=None, on_file=None) -> dict:
+    """Transcribes many recordings with a single model load and returns a per-file throughput report.
+
+    Recordings whose transcript.txt is already newer than the audio are skipped unless `force`.
+    `progress(done, total)` and `on_file(row)` are called as files finish.
+    """
+    backend = get_backend(backend)
+    started = time.perf_counter()
+    todo = [path for path in audio_paths if force or not transcript_up_to_date(path)]
+    files = [
+        {"session": os.path.basename(os.path.dirname(path)), "audio": path, "status": "skipped"}
+        for path in audio_paths if path not in todo
+    ]
+    workers = max(1, min(workers or batch_workers(backend.name), len(todo) or 1))
+    if progress:
+        progress(len(files), len(audio_paths))
+
+    load_seconds = 0.0
+    if todo:
+        # Load once up front; every worker then shares the cached model
+        get_model(OPENAI_MODEL, backend.name)
+        load_seconds = time.perf_counter() - started
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="BatchTranscribe") as pool:
+            futures = [pool.submit(_transcribe_file, path, backend.name) for path in todo]
+            for future in as_completed(futures):
+                row = future.result()
+                files.append(row)
+                if on_file:
+                    on_file(row)
+                if progress:
+                    progress(len(files), len(audio_paths))
+
+    order = {path: i for i, path in enumerate(audio_paths)}
+    files.sort(key=lambda row: order[row["audio"]])
+    wall_seconds = time.perf_counter() - started
+    audio_seconds = sum(row.get("audio_seconds", 0) for row in files)
+    return {
+        "backend": backend.name,
+        "model": OPENAI_MODEL,
+        "workers": workers,
+        "files": files,
+        "transcribed": sum(row["status"] == "done" for row in files),
+        "skipped": sum(row["status"] == "skipped" for row in files),
+        "errors": sum(row["status"] == "error" for row in files),
+        "audio_seconds": round(audio_seconds, 2),
+        "model_load_seconds": round(load_seconds, 3),
+        "wall_seconds": round(wall_seconds, 3),
+        # Seconds of audio transcribed per wall-clock second
+        "throughput": round(audio_seconds / wall_seconds, 2) if wall_seconds else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-transcribes recorded sessions with a single model load.")
+    parser.add_argument("targets", nargs="+", help="session directories, quoted glob patterns or audio files")
+    parser.add_argument("--workers", type=int, help="parallel workers (default: sized to the CPU cores)")
+    parser.add_argument("--force", action="store_true", help="also redo sessions with an up-to-date transcript.txt")
+    parser.add_argument("--backend", default=TRANSCRIBE_BACKEND, choices=list(BACKENDS))
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    audio_paths = find_session_audio(args.targets)
+    if not audio_paths:
+        sys.exit("No recordings found")
+
+    report = transcribe_batch(audio_paths, workers=args.workers, force=args.force, backend=args.backend)
+    for row in report["files"]:
+        if row["status"] == "done":
+            print(
+                f"{row['session']:>28}: {row['audio_seconds']:8.1f}s audio in {row['seconds']:7.1f}s "
+                f"(RTF {row['rtf']}), {row['chars']} chars"
+            )
+        else:
+            print(f"{row['session']:>28}: {row['status']} {row.get('error', '')}")
+    print(
+        f"{report['transcribed']} transcribed, {report['skipped']} skipped, {report['errors']} failed "
+        f"with {report['workers']} worker(s); {report['audio_seconds']:.1f}s audio in {report['wall_seconds']:.1f}s "
+        f"(x{report['throughput']} real time, model load {report['model_load_seconds']:.1f}s)"
+    )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+
+# Fetched transcripts are cached on disk as <video_id>.<languages>.json for YOUTUBE_CACHE_TTL_HOURS
+YOUTUBE_CACHE_DIR = os.getenv(
+    "YOUTUBE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "youtube")
+)
+YOUTUBE_CACHE_TTL_HOURS = float(os.getenv("YOUTUBE_CACHE_TTL_HOURS", 24))
+YOUTUBE_LANGUAGES = tuple(lang.strip() for lang in os.getenv("YOUTUBE_LANGUAGES", "en").split(",") if lang.strip())
+YOUTUBE_CONCURRENCY = max(1, int(os.getenv("YOUTUBE_CONCURRENCY", 4)))
+# Directory of <video_id>.json transcripts served instead of YouTube (offline use and testing)
+YOUTUBE_FETCHER_DIR = os.getenv("YOUTUBE_FETCHER_DIR")
+
+VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+LANGUAGE_RE = re.compile(r"^[A-Za-z]{2,3}(-[A-Za-z0-9]{2,8})*$")
+YOUTUBE_HOSTS = ("youtube.com", "youtube-nocookie.com", "youtu.be")
+PATH_PREFIXES = ("embed", "shorts", "live", "v", "e")
+
+class TranscriptUnavailable(Exception):
+    """The video has no transcript in the requested languages (or transcripts are disabled)."""
+
+def video_id(url: str) -> str:
+    """Extracts the video id from watch, youtu.be, shorts, embed and live URLs (or a bare id)."""
+    url = url.strip()
+    if VIDEO_ID_RE.match(url):
+        return url
+    parsed = urlparse(url if "://" in url else "https://" + url)
+    host = (parsed.hostname or "").lower()
+    if not any(host == h or host.endswith("." + h) for h in YOUTUBE_HOSTS):
+        raise ValueError(f"Not a YouTube URL: {url}")
+
+    parts = [part for part in parsed.path.split("/") if part]
+    candidate = None
+    if host.endswith("youtu.be"):
+        candidate = parts[0] if parts else None
+    elif parts[:1] == ["watch"] or not parts:
+        candidate = parse_qs(parsed.query).get("v", [None])[0]
+    elif len(parts) >= 2 and parts[0] in PATH_PREFIXES:
+        candidate = parts[1]
+    if candidate and VIDEO_ID_RE.match(candidate):
+        return candidate
+    if "list" in parse_qs(parsed.query):
+        raise ValueError(f"Playlist URLs are not supported; pass the video URLs: {url}")
+    raise ValueError(f"No video id in YouTube URL: {url}")
+
+def youtube_fetcher(video_id: str, languages) -> list:
+    """Fetches [{text, start, duration}] from YouTube with youtube_transcript_api."""
+    from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
+
+    try:
+        if hasattr(YouTubeTranscriptApi, "get_transcript"):
+            return YouTubeTranscriptApi.get_transcript(video_id, languages=list(languages))
+        return YouTubeTranscriptApi().fetch(video_id, languages=list(languages)).to_raw_data()
+    except (TranscriptsDisabled, NoTranscriptFound) as e:
+        raise TranscriptUnavailable(str(e)) from e
+
+def directory_fetcher(directory: str):
+    """Returns a fetcher reading <directory>/<video_id>.json instead of calling YouTube."""
+    def fetch(video_id: str, languages) -> list:
+        path = os.path.join(directory, video_id + ".json")
+        if not os.path.exists(path):
+            raise TranscriptUnavailable(f"No local transcript for {video_id}")
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return fetch
+
+def default_fetcher():
+    return directory_fetcher(YOUTUBE_FETCHER_DIR) if YOUTUBE_FETCHER_DIR else youtube_fetcher
+
+class TranscriptCache:
+    """Transcript lookups by (video id, languages) with a TTL'd disk cache in front of `fetcher`.
+
+    `fetcher(video_id, languages)` returns [{text, start, duration}] or raises TranscriptUnavailable.
+    """
+
+    def __init__(self, fetcher=None, cache_dir=YOUTUBE_CACHE_DIR, ttl_hours=YOUTUBE_CACHE_TTL_HOURS):
+        self.fetcher = fetcher or default_fetcher()
+        self.cache_dir = cache_dir
+        self.ttl = ttl_hours * 3600
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> Event, so concurrent lookups of one video fetch once
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def _read(self, key: str):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if time.time() - entry.get("fetched", 0) > self.ttl:
+            return None
+        return entry
+
+    def _write(self, key: str, entry: dict):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, self._path(key))
+
+    def get(self, url: str, languages=None, refresh: bool = False) -> dict:
+        """Returns {video_id, languages, segments, fetched, cached} for a video URL or id."""
+        vid = video_id(url)
+        languages = tuple(languages or YOUTUBE_LANGUAGES)
+        if not all(LANGUAGE_RE.match(lang) for lang in languages):
+            raise ValueError(f"Invalid language code in {list(languages)}")
+        key = f"{vid}.{'+'.join(languages)}"
+
+        while True:
+            entry = None if refresh else self._read(key)
+            if entry:
+                with self._lock:
+                    self.stats["hits"] += 1
+                return {**entry, "cached": True}
+            with self._lock:
+                waiting = self._inflight.get(key)
+                if waiting is None:
+                    self._inflight[key] = threading.Event()
+                    self.stats["misses"] += 1
+                    break
+            waiting.wait()
+            refresh = False  # the other lookup just refreshed it
+
+        try:
+            segments = [
+                {"text": seg["text"], "start": float(seg["start"]), "duration": float(seg.get("duration", 0))}
+                for seg in self.fetcher(vid, languages)
+            ]
+            entry = {"video_id": vid, "languages": list(languages), "segments": segments, "fetched": time.time()}
+            self._write(key, entry)
+            logging.info(f"Fetched YouTube transcript {vid} ({len(segments)} segments)")
+            return {**entry, "cached": False}
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def bulk(self, urls, languages=None, concurrency: int = YOUTUBE_CONCURRENCY, on_result=None) -> list:
+        """Looks up many videos with at most `concurrency` fetches in flight.
+
+        Returns one {url, video_id?, ok, error?, ...} entry per URL, in input order;
+        `on_result(index, entry)` is called as each one finishes.
+        """
+        def one(index, url):
+            try:
+                entry = {"url": url, "ok": True, **self.get(url, languages)}
+            except (ValueError, TranscriptUnavailable) as e:
+                entry = {"url": url, "ok": False, "error": str(e)}
+            except Exception as e:
+                logging.exception(f"YouTube transcript fetch failed for {url}")
+                entry = {"url": url, "ok": False, "error": f"Fetch failed: {e}"}
+            if on_result:
+                on_result(index, entry)
+            return entry
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="YouTubeFetch") as pool:
+            return list(pool.map(one, range(len(urls)), urls))
+
+def transcript_text(segments) -> str:
+    return "\n".join(seg["text"] for seg in segments)
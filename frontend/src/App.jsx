@@ -8,6 +8,10 @@ import myBackground from "/image.png"; // Background image
 // Define SYSTEM_PROMPT for summarization requests
 const SYSTEM_PROMPT = "Provide a concise and comprehensive summary of the lecture content.";
 
+// Query string pinning a request to one backend session (the backend falls back to the latest)
+const sessionQuery = (sessionFolder) =>
+  sessionFolder ? `?session_id=${encodeURIComponent(sessionFolder)}` : "";
+
 // Simple spinner component
 function Spinner() {
   return (
@@ -95,6 +99,7 @@ function App() {
   const [sessionFolder, setSessionFolder] = useState("");
   const [transcript, setTranscript] = useState("");
   const [summary, setSummary] = useState(null);
+  const [partialSummary, setPartialSummary] = useState(null);
   const [jobId, setJobId] = useState(null);
   // Tabs: "home", "video", "transcript", "summary"
   const [activeTab, setActiveTab] = useState("home");
@@ -130,7 +135,7 @@ function App() {
   const stopSession = async () => {
     console.log("Stopping session...");
     try {
-      await fetch("http://localhost:8000/stop-session", { method: "POST" });
+      await fetch(`http://localhost:8000/stop-session${sessionQuery(sessionFolder)}`, { method: "POST" });
       setIsRecording(false);
       console.log("Stop signal sent.");
     } catch (error) {
@@ -142,7 +147,7 @@ function App() {
     console.log("Starting transcription...");
     setLoading((prev) => ({ ...prev, transcribe: true }));
     try {
-      const res = await fetch("http://localhost:8000/transcribe", {
+      const res = await fetch(`http://localhost:8000/transcribe${sessionQuery(sessionFolder)}`, {
         method: "POST"
       });
       const data = await res.json();
@@ -160,7 +165,7 @@ function App() {
     console.log("Starting summarization job...");
     setLoading((prev) => ({ ...prev, summarize: true }));
     try {
-      const res = await fetch("http://localhost:8000/summarize", {
+      const res = await fetch(`http://localhost:8000/summarize${sessionQuery(sessionFolder)}`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ system_prompt: SYSTEM_PROMPT })
@@ -179,29 +184,28 @@ function App() {
 
   useEffect(() => {
     if (!jobId) return;
-    const interval = setInterval(async () => {
-      try {
-        const res = await fetch(`http://localhost:8000/summary/${jobId}`);
-        if (!res.ok) {
-          throw new Error(`HTTP error! status: ${res.status}`);
-        }
-        const data = await res.json();
-        console.log("Polling summary job:", data);
-        if (data.status === "done" || data.status === "error") {
-          if (data.status === "done") {
-            setSummary(data.result);
-          } else {
-            console.error("Summarization job failed:", data.result);
-          }
-          setJobId(null);
-          setLoading((prev) => ({ ...prev, summarize: false }));
-          clearInterval(interval);
-        }
-      } catch (error) {
-        console.error("Error polling summary job:", error);
-      }
-    }, 5000);
-    return () => clearInterval(interval);
+    // Summary fields arrive one by one as the model finishes them
+    const source = new EventSource(`http://localhost:8000/summary/${jobId}/stream`);
+    const finish = () => {
+      source.close();
+      setPartialSummary(null);
+      setJobId(null);
+      setLoading((prev) => ({ ...prev, summarize: false }));
+    };
+    source.addEventListener("field", (event) => {
+      const { key, value } = JSON.parse(event.data);
+      setPartialSummary((prev) => ({ ...(prev || {}), [key]: value }));
+    });
+    source.addEventListener("done", (event) => {
+      setSummary(JSON.parse(event.data));
+      finish();
+    });
+    source.addEventListener("error", (event) => {
+      // Named "error" events carry the job failure; plain connection errors have no data
+      console.error("Summarization job failed:", event.data || "connection lost");
+      finish();
+    });
+    return () => source.close();
   }, [jobId]);
 
   // Export PDF with professional and colorful styling.
@@ -539,7 +543,7 @@ function App() {
                 </button>
               )}
             </div>
-            {summary && <SummaryCard summary={summary} />}
+            {(partialSummary || summary) && <SummaryCard summary={partialSummary || summary} />}
           </div>
         )}
       </div>